@@ -7,6 +7,7 @@ Plots are saved under /data and their paths are returned so the GUI can show the
 
 import os
 import sys
+import zlib
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -27,6 +28,29 @@ def safe_load_csv(filename):
         print(f"Error reading {filename}: {e}")
         return None
 
+# -------------------------------------------------------------------
+# Tracking Trajectories
+# -------------------------------------------------------------------
+def load_trajectory(result_id, base_url="http://127.0.0.1:5000"):
+    """Fetch one tracking trajectory as an (n_samples, n_columns) float32 array and its column names."""
+    import requests
+    r = requests.get(f"{base_url}/results/{result_id}/trajectory")
+    if r.status_code != 200:
+        return None, []
+    columns = r.headers["X-Trajectory-Columns"].split(",")
+    samples = np.frombuffer(zlib.decompress(r.content), dtype=r.headers["X-Trajectory-Dtype"])
+    return samples.reshape(-1, len(columns)), columns
+
+
+def load_trajectories(result_ids, base_url="http://127.0.0.1:5000"):
+    """Fetch several trajectories, returning {result_id: array} for the ones that exist."""
+    trajectories = {}
+    for result_id in result_ids:
+        samples, _ = load_trajectory(result_id, base_url)
+        if samples is not None:
+            trajectories[result_id] = samples
+    return trajectories
+
 # -------------------------------------------------------------------
 # Quiz Results Analysis
 # -------------------------------------------------------------------
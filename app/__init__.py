@@ -0,0 +1,35 @@
+from flask import Flask
+from app.cache import LRUCache
+from app.config import Config
+from app.ingest import WriteBehindQueue
+from app.metrics import init_metrics
+from app.storage import init_storage
+
+
+# Build the Flask app, set up storage once, then register the API routes
+def create_app(config=Config):
+    app = Flask(__name__)
+    app.config.from_object(config)
+    init_storage(app)
+    init_metrics(app)
+    app.extensions["quiz_csv_cache"] = LRUCache(app.config["QUIZ_CSV_CACHE_SIZE"])
+    app.extensions["shutdown_hooks"] = []
+    if app.config["WRITE_BEHIND"]:
+        write_behind = WriteBehindQueue(
+            app,
+            maxsize=app.config["WRITE_BEHIND_QUEUE_SIZE"],
+            batch_size=app.config["WRITE_BEHIND_BATCH_SIZE"],
+            flush_interval=app.config["WRITE_BEHIND_FLUSH_INTERVAL"],
+        )
+        app.extensions["write_behind"] = write_behind
+        app.extensions["shutdown_hooks"].append(write_behind.close)
+
+    from app.routes import api
+    from app.archive import archive_command
+    from app.export import export_command
+    from app.rollups import rebuild_rollups_command
+    app.register_blueprint(api)
+    app.cli.add_command(rebuild_rollups_command)
+    app.cli.add_command(export_command)
+    app.cli.add_command(archive_command)
+    return app
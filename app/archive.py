@@ -0,0 +1,186 @@
+import base64
+import glob
+import gzip
+import json
+import os
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import select
+from app.export import EXPORT_TABLES
+from app.models import db, TestResult, QuizResult, QuizAnswer, Trajectory
+
+# cold rows go to <ARCHIVE_DIR>/<table>-<YYYY-MM>.ndjson.gz, one JSON object per row
+ARCHIVED_TABLES = ("test_result", "quiz_result", "quiz_answer", "trajectory")
+
+
+def archive_path(table, month):
+    return os.path.join(current_app.config["ARCHIVE_DIR"], f"{table}-{month}.ndjson.gz")
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode("ascii")
+    return value
+
+
+# Append rows to their monthly archive files and fsync them before the rows are deleted
+def _append(table, rows_by_month):
+    for month, rows in rows_by_month.items():
+        # each append adds a gzip member; gzip readers see the members as one stream
+        with open(archive_path(table, month), "ab") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="ab") as file:
+                for row in rows:
+                    file.write((json.dumps({k: _encode(v) for k, v in row.items()}) + "\n").encode())
+            # fsync through the write handle; Windows refuses fsync on a read-only one
+            raw.flush()
+            os.fsync(raw.fileno())
+
+
+def _group_by_month(rows, month_of):
+    grouped = {}
+    for row in rows:
+        grouped.setdefault(month_of(row), []).append(row)
+    return grouped
+
+
+# Archive one batch of old test results (with trajectories); returns rows moved
+def _archive_test_batch(cutoff, batch_size):
+    _, columns = EXPORT_TABLES["test_result"]
+    rows = db.session.execute(
+        select(*(getattr(TestResult, c) for c in columns))
+        .where(TestResult.timestamp < cutoff).order_by(TestResult.id).limit(batch_size)
+    ).mappings().all()
+    if not rows:
+        return 0
+    ids = [row["id"] for row in rows]
+    month_of_id = {row["id"]: row["timestamp"].strftime("%Y-%m") for row in rows}
+    _, trajectory_columns = EXPORT_TABLES["trajectory"]
+    trajectories = db.session.execute(
+        select(*(getattr(Trajectory, c) for c in trajectory_columns)).where(Trajectory.test_result_id.in_(ids))
+    ).mappings().all()
+    # trajectories carry their result's user_id so archived exports can still filter by user
+    user_of_id = {row["id"]: row["user_id"] for row in rows}
+    trajectories = [dict(t, user_id=user_of_id[t["test_result_id"]]) for t in trajectories]
+
+    _append("test_result", _group_by_month(rows, lambda r: month_of_id[r["id"]]))
+    _append("trajectory", _group_by_month(trajectories, lambda r: month_of_id[r["test_result_id"]]))
+    db.session.query(Trajectory).filter(Trajectory.test_result_id.in_(ids)).delete(synchronize_session=False)
+    db.session.query(TestResult).filter(TestResult.id.in_(ids)).delete(synchronize_session=False)
+    db.session.commit()
+    return len(rows)
+
+
+# Archive one batch of old quizzes (with their answers); returns rows moved
+def _archive_quiz_batch(cutoff, batch_size):
+    _, columns = EXPORT_TABLES["quiz_result"]
+    rows = db.session.execute(
+        select(*(getattr(QuizResult, c) for c in columns), QuizResult.csv_data)
+        .where(QuizResult.timestamp < cutoff).order_by(QuizResult.id).limit(batch_size)
+    ).mappings().all()
+    if not rows:
+        return 0
+    ids = [row["id"] for row in rows]
+    quiz_by_id = {row["id"]: row for row in rows}
+    _, answer_columns = EXPORT_TABLES["quiz_answer"]
+    answers = db.session.execute(
+        select(*(getattr(QuizAnswer, c) for c in answer_columns))
+        .where(QuizAnswer.quiz_result_id.in_(ids)).order_by(QuizAnswer.id)
+    ).mappings().all()
+    # answers carry their quiz's user_id so archived exports can still filter by user
+    answers = [dict(answer, user_id=quiz_by_id[answer["quiz_result_id"]]["user_id"]) for answer in answers]
+
+    month_of = lambda quiz_id: quiz_by_id[quiz_id]["timestamp"].strftime("%Y-%m")
+    _append("quiz_result", _group_by_month(rows, lambda r: month_of(r["id"])))
+    _append("quiz_answer", _group_by_month(answers, lambda r: month_of(r["quiz_result_id"])))
+    db.session.query(QuizAnswer).filter(QuizAnswer.quiz_result_id.in_(ids)).delete(synchronize_session=False)
+    db.session.query(QuizResult).filter(QuizResult.id.in_(ids)).delete(synchronize_session=False)
+    db.session.commit()
+    return len(rows)
+
+
+# Return freed pages to the filesystem, switching the database to incremental auto_vacuum once
+def compact():
+    raw = db.engine.raw_connection()
+    try:
+        connection = raw.driver_connection
+        if connection.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            connection.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            connection.execute("VACUUM")
+        # executescript steps the pragma to completion; execute() would free a single page
+        connection.executescript("PRAGMA incremental_vacuum;")
+    finally:
+        raw.close()
+
+
+# Move results older than `days` into monthly archives in batched transactions, then compact
+def archive_old_results(days, batch_size=1000):
+    os.makedirs(current_app.config["ARCHIVE_DIR"], exist_ok=True)
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    moved = {"test_result": 0, "quiz_result": 0}
+    for table, archive_batch in (("test_result", _archive_test_batch), ("quiz_result", _archive_quiz_batch)):
+        while True:
+            count = archive_batch(cutoff, batch_size)
+            if not count:
+                break
+            moved[table] += count
+    compact()
+    return moved
+
+
+# Yield archived rows for a table as tuples of its export columns, oldest month first
+def iter_archived_rows(table, mode=None, user_id=None, start=None, end=None):
+    if table not in ARCHIVED_TABLES or table not in EXPORT_TABLES:
+        return
+    _, columns = EXPORT_TABLES[table]
+    time_columns = [c for c in columns if c in ("timestamp", "created_at")]
+    paths = sorted(glob.glob(os.path.join(current_app.config["ARCHIVE_DIR"], f"{table}-*.ndjson.gz")))
+    for path in paths:
+        # skip whole months outside the requested range
+        month = datetime.strptime(os.path.basename(path)[len(table) + 1:len(table) + 8], "%Y-%m")
+        next_month = (month + timedelta(days=32)).replace(day=1)
+        if (start and next_month <= start) or (end and month >= end):
+            continue
+        with gzip.open(path, "rt") as file:
+            for line in file:
+                row = json.loads(line)
+                for column in time_columns:
+                    if row.get(column):
+                        row[column] = datetime.fromisoformat(row[column])
+                when = row.get(time_columns[0]) if time_columns else None
+                if mode is not None and "mode" in row and row["mode"] != mode:
+                    continue
+                if user_id is not None and row.get("user_id") != user_id:
+                    continue
+                if when is not None and ((start and when < start) or (end and when >= end)):
+                    continue
+                yield tuple(row.get(c) for c in columns)
+
+
+# An archived trajectory as (sample_count, columns, zlib bytes), or None. Scans the trajectory
+# archives newest month first, so it is only meant for the occasional read of a cold result.
+def find_archived_trajectory(result_id):
+    paths = sorted(glob.glob(os.path.join(current_app.config["ARCHIVE_DIR"], "trajectory-*.ndjson.gz")), reverse=True)
+    for path in paths:
+        with gzip.open(path, "rt") as file:
+            for line in file:
+                row = json.loads(line)
+                if row["test_result_id"] == result_id:
+                    return row["sample_count"], row["columns"], base64.b64decode(row["data"])
+    return None
+
+
+@click.command("archive")
+@click.option("--days", type=int, default=None, help="Archive results older than this (default: RETENTION_DAYS).")
+@click.option("--batch-size", type=int, default=None, help="Rows moved per transaction.")
+@with_appcontext
+def archive_command(days, batch_size):
+    """Move old results into monthly compressed archives and compact the database."""
+    days = current_app.config["RETENTION_DAYS"] if days is None else days
+    batch_size = batch_size or current_app.config["ARCHIVE_BATCH_SIZE"]
+    moved = archive_old_results(days, batch_size)
+    click.echo(f"Archived {moved['test_result']} test results and {moved['quiz_result']} quizzes "
+               f"older than {days} days to {current_app.config['ARCHIVE_DIR']}.")
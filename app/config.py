@@ -3,8 +3,53 @@ basedir = os.path.abspath(os.path.dirname(__file__))
 
 class Config:
     # backend
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///' + os.path.join(basedir, 'database.db')
+    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL', 'sqlite:///' + os.path.join(basedir, 'database.db'))
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    MAX_BATCH_SIZE = 5000
+    MAX_DECOMPRESSED_BODY = 64 * 1024 * 1024  # bytes, for gzip request bodies
+    GZIP_MIN_SIZE = 1024  # responses smaller than this are sent uncompressed
+    DEFAULT_PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 500
+    MAX_TRAJECTORY_SAMPLES = 200_000  # per tracking session
+    MAX_META_BYTES = 16 * 1024  # serialized metadata per test result
+    QUIZ_CSV_CACHE_SIZE = 256  # users whose latest quiz CSV is kept in memory
+
+    # write-behind ingestion: uploads are queued, acknowledged with 202 and group-committed
+    WRITE_BEHIND = os.environ.get('WRITE_BEHIND', '0') == '1'
+    WRITE_BEHIND_QUEUE_SIZE = 10000  # queued uploads before clients get 503
+    WRITE_BEHIND_BATCH_SIZE = 500  # max uploads per commit
+    WRITE_BEHIND_FLUSH_INTERVAL = 0.05  # seconds to wait for a group to fill
+
+    # retention: `flask archive` moves older results to monthly NDJSON.gz files here
+    ARCHIVE_DIR = os.environ.get('ARCHIVE_DIR', os.path.join(basedir, 'archive'))
+    RETENTION_DAYS = 365
+    ARCHIVE_BATCH_SIZE = 1000
+
+    # connection pool (file databases only)
+    DB_POOL_SIZE = 10
+    DB_MAX_OVERFLOW = 20
+    DB_POOL_TIMEOUT = 30
+
+    # applied to every new SQLite connection; set to {} to use SQLite defaults
+    SQLITE_PRAGMAS = {
+        "auto_vacuum": "INCREMENTAL",  # only takes effect on new databases; `flask archive` converts old ones
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -20000,  # negative means KiB, so ~20 MB
+        "busy_timeout": 5000,  # ms to wait on a locked database
+    }
+
+    # server (run_server.py flags override these)
+    SERVER_HOST = os.environ.get('SERVER_HOST', '127.0.0.1')
+    SERVER_PORT = int(os.environ.get('SERVER_PORT', 5000))
+    SERVER_THREADS = int(os.environ.get('SERVER_THREADS', 8))
+
+    # frontend backend client
+    API_BASE_URL = os.environ.get('API_BASE_URL', 'http://127.0.0.1:5000')
+    API_CONNECT_TIMEOUT = 3.05  # seconds
+    API_READ_TIMEOUT = 10  # seconds
+    API_RETRIES = 3
+    API_BACKOFF = 0.25  # seconds, doubled each retry
 
     # frontend
     CANVAS_WIDTH = 900
@@ -12,10 +57,26 @@ class Config:
     MIN_TARGET_RADIUS = 20
     MAX_TARGET_RADIUS = 50
 
+    # tracking trajectories are uploaded as zlib-compressed little-endian float32 rows of these columns
+    TRAJECTORY_COLUMNS = ("t", "cursor_x", "cursor_y", "target_x", "target_y")
+
     # timer durations (seconds)
     TRACKING_TEST_DURATION = 10
     BALANCE_TEST_DURATION = 15
 
+    # fixed simulation timesteps (seconds) and the redraw interval (ms) for the animated tests
+    TRACKING_TIMESTEP = 0.03
+    BALANCE_TIMESTEP = 0.05
+    FRAME_INTERVAL_MS = 16
+    # runs where more than this share of frames missed their deadline are flagged as degraded
+    DEGRADED_FRAME_RATIO = 0.1
+    # balance reaction latency: the bar is drifting once it leans past this angle (degrees);
+    # at most this many latencies are kept per game
+    BALANCE_DRIFT_THRESHOLD = 5
+    BALANCE_LATENCY_CAPACITY = 256
+    # save input recordings of every test under data/recordings for replay (python -m frontend.recording)
+    RECORD_SESSIONS = os.environ.get('RECORD_SESSIONS', '0') == '1'
+
     # UI theme
     BG_COLOR = "#f8f9fa"
     PRIMARY_COLOR = "#1f77b4"
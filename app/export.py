@@ -0,0 +1,149 @@
+import base64
+import csv
+import io
+import json
+import sys
+import zlib
+from datetime import date, datetime
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import select
+from app.models import db, User, TestResult, QuizResult, QuizAnswer, Trajectory
+
+# exportable tables and the columns written for each (legacy blob columns are left out;
+# trajectory data is written as base64 of the stored zlib bytes)
+EXPORT_TABLES = {
+    "user": (User, ("id", "username", "created_at")),
+    "test_result": (TestResult, ("id", "user_id", "avg_time", "accuracy", "mode", "timestamp",
+                                 "idempotency_key", "meta")),
+    "quiz_result": (QuizResult, ("id", "user_id", "score", "total_questions", "timestamp", "idempotency_key")),
+    "quiz_answer": (QuizAnswer, ("id", "quiz_result_id", "position", "question", "user_answer",
+                                 "correct_answer", "is_correct")),
+    "trajectory": (Trajectory, ("id", "test_result_id", "sample_count", "columns", "data")),
+}
+FORMATS = ("csv", "ndjson")
+CHUNK_SIZE = 1000
+
+
+# Parse an ISO date or datetime filter value (None stays None)
+def parse_when(value):
+    return datetime.fromisoformat(value) if value else None
+
+
+# Build WHERE clauses for the filters that apply to this table
+def build_filters(model, mode=None, user_id=None, start=None, end=None):
+    clauses = []
+    time_column = getattr(model, "timestamp", None) or getattr(model, "created_at", None)
+    if mode is not None and hasattr(model, "mode"):
+        clauses.append(model.mode == mode)
+    if user_id is not None:
+        if model is User:
+            clauses.append(User.id == user_id)
+        elif hasattr(model, "user_id"):
+            clauses.append(model.user_id == user_id)
+        elif model is QuizAnswer:
+            clauses.append(QuizAnswer.quiz_result_id.in_(select(QuizResult.id).where(QuizResult.user_id == user_id)))
+        elif model is Trajectory:
+            clauses.append(Trajectory.test_result_id.in_(select(TestResult.id).where(TestResult.user_id == user_id)))
+    if time_column is not None:
+        if start is not None:
+            clauses.append(time_column >= start)
+        if end is not None:
+            clauses.append(time_column < end)
+    return clauses
+
+
+# Yield rows from a hot table in id order, fetched chunk by chunk so memory stays flat
+def iter_rows(table, filters=(), chunk_size=CHUNK_SIZE):
+    model, columns = EXPORT_TABLES[table]
+    stmt = select(*(getattr(model, c) for c in columns)).where(*filters).order_by(model.id)
+    result = db.session.execute(stmt, execution_options={"stream_results": True, "yield_per": chunk_size})
+    for row in result:
+        yield tuple(row)
+
+
+# Plain value for a text export: ISO dates and base64 bytes (archived rows already hold base64)
+def _text_value(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, bytes):
+        return base64.b64encode(value).decode("ascii")
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date, bytes)):
+        return _text_value(value)
+    raise TypeError(f"cannot serialize {type(value).__name__}")
+
+
+# Serialize rows into text chunks of roughly chunk_size rows each
+def format_rows(columns, rows, fmt="csv", chunk_size=CHUNK_SIZE):
+    buffer = io.StringIO()
+    if fmt == "csv":
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        write = lambda row: writer.writerow([_text_value(v) for v in row])
+    else:
+        write = lambda row: buffer.write(json.dumps(dict(zip(columns, row)), default=_json_default) + "\n")
+
+    pending = 0
+    for row in rows:
+        write(row)
+        pending += 1
+        if pending >= chunk_size:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+    yield buffer.getvalue()
+
+
+# Gzip a stream of text chunks on the fly
+def gzip_chunks(chunks):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+# Archived rows first (they are the oldest), then the matching hot rows
+def iter_all_rows(table, include_archived=True, **filter_args):
+    from app.archive import iter_archived_rows
+    model, _ = EXPORT_TABLES[table]
+    if include_archived:
+        yield from iter_archived_rows(table, **filter_args)
+    yield from iter_rows(table, build_filters(model, **filter_args))
+
+
+# Full export pipeline: filtered rows -> CSV/NDJSON text -> optional gzip
+def export_stream(table, fmt="csv", compress=False, include_archived=True, **filter_args):
+    _, columns = EXPORT_TABLES[table]
+    chunks = format_rows(columns, iter_all_rows(table, include_archived, **filter_args), fmt)
+    return gzip_chunks(chunks) if compress else (chunk.encode() for chunk in chunks)
+
+
+@click.command("export")
+@click.argument("table", type=click.Choice(list(EXPORT_TABLES)))
+@click.option("--format", "fmt", type=click.Choice(FORMATS), default="csv", show_default=True)
+@click.option("--mode", help="Only test results in this mode.")
+@click.option("--user-id", type=int, help="Only rows for this user.")
+@click.option("--start", help="Only rows at or after this ISO date/time.")
+@click.option("--end", help="Only rows before this ISO date/time.")
+@click.option("--gzip", "compress", is_flag=True, help="Gzip the output.")
+@click.option("--hot-only", is_flag=True, help="Skip rows moved to the archive.")
+@click.option("-o", "--output", type=click.Path(dir_okay=False), help="Output file (default: stdout).")
+@with_appcontext
+def export_command(table, fmt, mode, user_id, start, end, compress, hot_only, output):
+    """Stream a table as CSV or NDJSON, including archived rows."""
+    stream = export_stream(table, fmt, compress, not hot_only, mode=mode, user_id=user_id,
+                           start=parse_when(start), end=parse_when(end))
+    target = open(output, "wb") if output else sys.stdout.buffer
+    try:
+        for chunk in stream:
+            target.write(chunk)
+    finally:
+        if output:
+            target.close()
@@ -0,0 +1,199 @@
+import atexit
+import logging
+import queue
+import threading
+import time
+from sqlalchemy import insert
+from app.models import db, TestResult, QuizResult, QuizAnswer, Trajectory
+from app.rollups import apply_rollups
+
+log = logging.getLogger(__name__)
+
+# outcomes of WriteBehindQueue.submit
+QUEUED, DUPLICATE, FULL = "queued", "duplicate", "full"
+
+
+# Idempotency keys from `keys` that are already stored for this model
+def existing_keys(model, keys):
+    keys = [key for key in keys if key]
+    if not keys:
+        return set()
+    return {key for (key,) in db.session.query(model.idempotency_key).filter(model.idempotency_key.in_(keys))}
+
+
+# The (kind, idempotency key) of a queued upload, or None if it has no key
+def upload_key(kind, payload):
+    key = payload.get("idempotency_key") if kind == "test" else payload[0].get("idempotency_key")
+    return (kind, key) if key else None
+
+
+# Insert validated test result rows, their trajectories and rollups (caller commits)
+def save_test_results(rows):
+    columns = [{k: v for k, v in row.items() if k != "trajectory"} for row in rows]
+    if not any(row.get("trajectory") for row in rows):
+        db.session.execute(insert(TestResult), columns)
+    else:
+        # Trajectories need the new ids, returned in parameter order by the bulk insert
+        ids = db.session.scalars(
+            insert(TestResult).returning(TestResult.id, sort_by_parameter_order=True), columns
+        ).all()
+        trajectories = [dict(row["trajectory"], test_result_id=result_id)
+                        for result_id, row in zip(ids, rows) if row.get("trajectory")]
+        db.session.execute(insert(Trajectory), trajectories)
+    apply_rollups(rows)
+
+
+# Insert one quiz and its answers in bulk, returning the new QuizResult (caller commits)
+def save_quiz(fields, answer_rows):
+    quiz = QuizResult(**fields)
+    db.session.add(quiz)
+    # Flush for the quiz id, then insert all answers inside the same transaction
+    db.session.flush()
+    if answer_rows:
+        db.session.execute(insert(QuizAnswer), [dict(row, quiz_result_id=quiz.id) for row in answer_rows])
+    return quiz
+
+
+class WriteBehindQueue:
+    # bounded queue of validated uploads that a background thread writes in group commits
+    def __init__(self, app, maxsize=10000, batch_size=500, flush_interval=0.05):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=maxsize)
+        self.enqueued = self.written = self.rejected = self.failed = self.commits = self.duplicates = 0
+        # idempotency keys queued but not yet written, so replays of them are not queued twice
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # Queue one upload ("test", row) or ("quiz", (fields, answer_rows)); returns QUEUED,
+    # DUPLICATE when an upload with the same idempotency key is already queued, or FULL
+    def submit(self, kind, payload):
+        if self._closed:
+            return FULL
+        key = upload_key(kind, payload)
+        with self._lock:
+            if key in self._pending:
+                self.duplicates += 1
+                return DUPLICATE
+            try:
+                self.queue.put_nowait((kind, payload))
+            except queue.Full:
+                self.rejected += 1
+                return FULL
+            if key:
+                self._pending.add(key)
+        self.enqueued += 1
+        return QUEUED
+
+    def depth(self):
+        return self.queue.qsize()
+
+    def stats(self):
+        return {
+            "depth": self.depth(),
+            "capacity": self.queue.maxsize,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "rejected": self.rejected,
+            "failed": self.failed,
+            "duplicates": self.duplicates,
+            "commits": self.commits,
+        }
+
+    # Stop accepting uploads and block until everything queued has been written
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.queue.put(None)
+        self._thread.join()
+
+    # Collect a group: wait for the first item, then take more until full or the interval passes
+    def _next_group(self):
+        first = self.queue.get()
+        if first is None:
+            return [], True
+        group = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(group) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                return group, True
+            group.append(item)
+        return group, False
+
+    def _run(self):
+        with self.app.app_context():
+            stopping = False
+            while not stopping:
+                group, stopping = self._next_group()
+                if group:
+                    self._write(group)
+                db.session.remove()
+            # Drain anything submitted before close() took effect
+            leftover = []
+            while not self.queue.empty():
+                item = self.queue.get_nowait()
+                if item is not None:
+                    leftover.append(item)
+            if leftover:
+                self._write(leftover)
+
+    # Write a group in one transaction; on failure retry items one by one to isolate bad ones
+    def _write(self, group):
+        try:
+            self._commit(group)
+        except Exception:
+            db.session.rollback()
+            log.exception("group commit of %d uploads failed, retrying individually", len(group))
+            for item in group:
+                try:
+                    self._commit([item])
+                except Exception:
+                    db.session.rollback()
+                    self.failed += 1
+                    log.exception("dropping %s upload after write failure", item[0])
+        finally:
+            with self._lock:
+                self._pending.difference_update(upload_key(kind, payload) for kind, payload in group)
+
+    # Drop uploads whose key is already stored or repeated earlier in the group. The writer is
+    # the only one inserting while write-behind is on, so this check cannot race another insert.
+    def _dedupe(self, group):
+        stored = set()
+        for kind, model in (("test", TestResult), ("quiz", QuizResult)):
+            keys = [key for key in (upload_key(k, payload) for k, payload in group if k == kind) if key]
+            stored |= {(kind, key) for key in existing_keys(model, [key for _, key in keys])}
+        unique = []
+        for kind, payload in group:
+            key = upload_key(kind, payload)
+            if key in stored:
+                continue
+            if key:
+                stored.add(key)
+            unique.append((kind, payload))
+        return unique
+
+    def _commit(self, group):
+        unique = self._dedupe(group)
+        test_rows = [payload for kind, payload in unique if kind == "test"]
+        quizzes = [payload for kind, payload in unique if kind == "quiz"]
+        if test_rows:
+            save_test_results(test_rows)
+        user_ids = {save_quiz(fields, answer_rows).user_id for fields, answer_rows in quizzes}
+        db.session.commit()
+        self.commits += 1
+        self.written += len(unique)
+        self.duplicates += len(group) - len(unique)
+        cache = self.app.extensions.get("quiz_csv_cache")
+        for user_id in user_ids:
+            cache.invalidate(user_id)
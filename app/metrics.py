@@ -0,0 +1,132 @@
+import threading
+import time
+from bisect import bisect_left
+from flask import g, has_request_context
+from sqlalchemy import event
+from app.models import db
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+
+def _format_labels(names, values, extra=""):
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    # monotonically increasing values keyed by a tuple of label values
+    def __init__(self, name, help_text, label_names=()):
+        self.name, self.help_text, self.label_names = name, help_text, label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels=(), amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+class Histogram:
+    # fixed buckets per label set; each series is one preallocated list of counts plus the sum
+    def __init__(self, name, help_text, label_names=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help_text, self.label_names = name, help_text, label_names
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((labels, list(series)) for labels, series in self._series.items())
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            label_text = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_text} {series[-1]!r}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Metrics:
+    # request, status and SQL metrics for one app, rendered in the Prometheus text format
+    def __init__(self):
+        self.request_duration = Histogram(
+            "http_request_duration_seconds", "Time spent handling a request.", ("endpoint", "method"))
+        self.requests = Counter(
+            "http_requests_total", "Requests by endpoint, method and status.", ("endpoint", "method", "status"))
+        self.query_duration = Histogram(
+            "db_query_duration_seconds", "Time spent in SQL per request.", ("endpoint",))
+        self.queries_per_request = Histogram(
+            "db_queries_per_request", "SQL statements executed per request.", ("endpoint",),
+            buckets=QUERY_COUNT_BUCKETS)
+        self.queries = Counter("db_queries_total", "SQL statements executed.", ("endpoint",))
+
+    # Record a finished request, including the SQL work collected while it ran
+    def observe_request(self, endpoint, method, status, duration, query_count, query_time):
+        self.request_duration.observe((endpoint, method), duration)
+        self.requests.inc((endpoint, method, str(status)))
+        self.queries_per_request.observe((endpoint,), query_count)
+        if query_count:
+            self.query_duration.observe((endpoint,), query_time)
+            self.queries.inc((endpoint,), query_count)
+
+    def render(self, gauges=()):
+        lines = []
+        for metric in (self.request_duration, self.requests, self.query_duration,
+                       self.queries_per_request, self.queries):
+            lines.extend(metric.render())
+        for name, help_text, value in gauges:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge", f"{name} {_format_value(value)}"]
+        return "\n".join(lines) + "\n"
+
+
+# Count and time SQL statements, attributing them to the current request
+def instrument_engine(engine, metrics):
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_start"] = time.perf_counter()
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info.pop("query_start", time.perf_counter())
+        if has_request_context() and "sql_count" in g:
+            g.sql_count += 1
+            g.sql_time += elapsed
+        else:
+            # background work such as the write-behind writer
+            metrics.queries.inc(("background",))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+
+def init_metrics(app):
+    metrics = Metrics()
+    app.extensions["metrics"] = metrics
+    with app.app_context():
+        instrument_engine(db.engine, metrics)
+    return metrics
@@ -11,21 +11,74 @@ class User(db.Model):
 
 
 class TestResult(db.Model):
+    __table_args__ = (
+        db.Index("ix_test_result_user_timestamp", "user_id", "timestamp"),
+        db.Index("ix_test_result_mode_accuracy", "mode", "accuracy"),
+        db.Index("ix_test_result_idempotency_key", "idempotency_key", unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     avg_time = db.Column(db.Float)
     accuracy = db.Column(db.Float)
     mode = db.Column(db.String(32))  # "normal" or "simulated"
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    idempotency_key = db.Column(db.String(64))  # set by clients that may replay uploads
+    meta = db.Column(db.Text)  # client-supplied JSON object, e.g. frame timing of the run
+
+
+class Trajectory(db.Model):
+    # raw tracking samples for one TestResult, stored exactly as uploaded (zlib-compressed float32)
+    id = db.Column(db.Integer, primary_key=True)
+    test_result_id = db.Column(db.Integer, db.ForeignKey('test_result.id'), unique=True, nullable=False)
+    sample_count = db.Column(db.Integer, nullable=False)
+    columns = db.Column(db.String(128), nullable=False)
+    data = db.Column(db.LargeBinary, nullable=False)
+
+
+class ResultRollup(db.Model):
+    # running aggregates of TestResult per user, mode and day, kept in step with inserts
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), primary_key=True)
+    mode = db.Column(db.String(32), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0)
+    avg_time_sum = db.Column(db.Float, nullable=False, default=0.0)
+    avg_time_sumsq = db.Column(db.Float, nullable=False, default=0.0)
+    avg_time_min = db.Column(db.Float)
+    avg_time_max = db.Column(db.Float)
+    accuracy_sum = db.Column(db.Float, nullable=False, default=0.0)
+    accuracy_sumsq = db.Column(db.Float, nullable=False, default=0.0)
+    accuracy_min = db.Column(db.Float)
+    accuracy_max = db.Column(db.Float)
 
 
 class QuizResult(db.Model):
+    __table_args__ = (
+        db.Index("ix_quiz_result_user_timestamp", "user_id", "timestamp"),
+        db.Index("ix_quiz_result_idempotency_key", "idempotency_key", unique=True),
+    )
+
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey('user.id'))
     score = db.Column(db.Integer)
     total_questions = db.Column(db.Integer)
-    csv_data = db.Column(db.Text)
+    csv_data = db.Column(db.Text)  # legacy uploads only; new quizzes store QuizAnswer rows
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    idempotency_key = db.Column(db.String(64))
+
+
+class QuizAnswer(db.Model):
+    __table_args__ = (
+        db.Index("ix_quiz_answer_quiz_position", "quiz_result_id", "position"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    quiz_result_id = db.Column(db.Integer, db.ForeignKey('quiz_result.id'), nullable=False)
+    position = db.Column(db.Integer, nullable=False)
+    question = db.Column(db.Text)
+    user_answer = db.Column(db.Text)
+    correct_answer = db.Column(db.Text)
+    is_correct = db.Column(db.Boolean)
 
 
 class QuizQuestion:
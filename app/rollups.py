@@ -0,0 +1,103 @@
+import click
+from flask.cli import with_appcontext
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from app.models import db, TestResult, ResultRollup
+
+METRICS = ("avg_time", "accuracy")
+
+
+# Fold result rows into one partial aggregate per (user, mode, day)
+def aggregate(rows):
+    partials = {}
+    for row in rows:
+        key = (row["user_id"], row["mode"], row["timestamp"].date())
+        partial = partials.get(key)
+        if partial is None:
+            partial = partials[key] = {"user_id": key[0], "mode": key[1], "day": key[2], "count": 0}
+            for metric in METRICS:
+                partial.update({f"{metric}_sum": 0.0, f"{metric}_sumsq": 0.0,
+                                f"{metric}_min": row[metric], f"{metric}_max": row[metric]})
+        partial["count"] += 1
+        for metric in METRICS:
+            value = row[metric]
+            partial[f"{metric}_sum"] += value
+            partial[f"{metric}_sumsq"] += value * value
+            partial[f"{metric}_min"] = min(partial[f"{metric}_min"], value)
+            partial[f"{metric}_max"] = max(partial[f"{metric}_max"], value)
+    return list(partials.values())
+
+
+# Merge rows into the rollup table; call inside the transaction that inserts them
+def apply_rollups(rows):
+    partials = aggregate(rows)
+    if not partials:
+        return
+    stmt = sqlite_insert(ResultRollup)
+    merged = {"count": ResultRollup.count + stmt.excluded.count}
+    for metric in METRICS:
+        for suffix in ("sum", "sumsq"):
+            column = f"{metric}_{suffix}"
+            merged[column] = getattr(ResultRollup, column) + getattr(stmt.excluded, column)
+        merged[f"{metric}_min"] = func.min(getattr(ResultRollup, f"{metric}_min"), getattr(stmt.excluded, f"{metric}_min"))
+        merged[f"{metric}_max"] = func.max(getattr(ResultRollup, f"{metric}_max"), getattr(stmt.excluded, f"{metric}_max"))
+    stmt = stmt.on_conflict_do_update(index_elements=["user_id", "mode", "day"], set_=merged)
+    db.session.execute(stmt, partials)
+
+
+# Mean, sample variance and extremes from count / sum / sum of squares
+def summarize(count, total, total_sq, minimum, maximum):
+    mean = total / count if count else None
+    variance = max(0.0, (total_sq - total * total / count) / (count - 1)) if count > 1 else 0.0
+    return {"mean": mean, "variance": variance, "min": minimum, "max": maximum}
+
+
+# Regenerate every rollup from raw TestResult rows (archived ones too), reading them in chunks
+def rebuild_rollups(chunk_size=5000):
+    from app.archive import iter_archived_rows
+    from app.export import EXPORT_TABLES
+    db.session.query(ResultRollup).delete()
+    last_id, total = 0, 0
+
+    _, archived_columns = EXPORT_TABLES["test_result"]
+    chunk = []
+    for values in iter_archived_rows("test_result"):
+        row = dict(zip(archived_columns, values))
+        if None not in (row["user_id"], row["mode"], row["timestamp"], row["avg_time"], row["accuracy"]):
+            chunk.append(row)
+        if len(chunk) >= chunk_size:
+            apply_rollups(chunk)
+            total += len(chunk)
+            chunk = []
+    if chunk:
+        apply_rollups(chunk)
+        total += len(chunk)
+
+    columns = (TestResult.id, TestResult.user_id, TestResult.mode, TestResult.timestamp,
+               TestResult.avg_time, TestResult.accuracy)
+    while True:
+        chunk = db.session.execute(
+            select(*columns)
+            .where(TestResult.id > last_id,
+                   TestResult.user_id.isnot(None), TestResult.mode.isnot(None),
+                   TestResult.timestamp.isnot(None),
+                   TestResult.avg_time.isnot(None), TestResult.accuracy.isnot(None))
+            .order_by(TestResult.id)
+            .limit(chunk_size)
+        ).mappings().all()
+        if not chunk:
+            break
+        apply_rollups(chunk)
+        last_id = chunk[-1]["id"]
+        total += len(chunk)
+    db.session.commit()
+    return total
+
+
+@click.command("rebuild-rollups")
+@click.option("--chunk-size", default=5000, show_default=True, help="Rows read per chunk.")
+@with_appcontext
+def rebuild_rollups_command(chunk_size):
+    """Regenerate the per-user/mode/day rollups from raw test results."""
+    total = rebuild_rollups(chunk_size)
+    click.echo(f"Rebuilt rollups from {total} results.")
@@ -1,70 +1,586 @@
-from flask import Flask, request, jsonify
-from app.models import db, User, TestResult, QuizResult
-from app.config import Config
+import base64
+import binascii
+import csv
+import io
+import json
+import math
+import time
+import zlib
+from datetime import datetime
+from flask import Blueprint, Response, current_app, g, request, jsonify, stream_with_context
+from sqlalchemy import func, tuple_
+from app.archive import find_archived_trajectory
+from app.export import EXPORT_TABLES, FORMATS, export_stream, parse_when
+from app.ingest import FULL, QUEUED, existing_keys, save_quiz, save_test_results
+from app.models import db, User, TestResult, QuizResult, QuizAnswer, ResultRollup, Trajectory
+from app.rollups import summarize
+from app.wire import compress_response, read_payload, respond
 
-app = Flask(__name__)
-app.config.from_object(Config)
-db.init_app(app)
+QUIZ_CSV_HEADER = ["Question", "Your Answer", "Correct Answer", "Correct?"]
 
+api = Blueprint("api", __name__)
+
+
+# Start timing the request and counting its SQL statements
+@api.before_app_request
+def start_request_metrics():
+    g.request_start = time.perf_counter()
+    g.sql_count = 0
+    g.sql_time = 0.0
+
+# Record latency, status and SQL work for the request's route
+@api.after_app_request
+def record_request_metrics(response):
+    if "request_start" in g:
+        endpoint = request.url_rule.rule if request.url_rule else "unmatched"
+        current_app.extensions["metrics"].observe_request(
+            endpoint, request.method, response.status_code,
+            time.perf_counter() - g.request_start, g.sql_count, g.sql_time)
+    return response
+
+# Gzip larger buffered responses when the client accepts it
+@api.after_app_request
+def gzip_response(response):
+    return compress_response(response)
+
+# Prometheus text exposition of the collected metrics
+@api.route("/metrics", methods=["GET"])
+def metrics():
+    gauges = []
+    queue = write_behind()
+    if queue:
+        stats = queue.stats()
+        gauges = [
+            ("write_behind_queue_depth", "Uploads waiting in the write-behind queue.", stats["depth"]),
+            ("write_behind_queue_capacity", "Write-behind queue capacity.", stats["capacity"]),
+            ("write_behind_written", "Uploads written by the write-behind writer.", stats["written"]),
+            ("write_behind_rejected", "Uploads rejected because the queue was full.", stats["rejected"]),
+            ("write_behind_failed", "Uploads dropped after write failures.", stats["failed"]),
+            ("write_behind_duplicates", "Replayed uploads dropped by the write-behind queue.", stats["duplicates"]),
+        ]
+    body = current_app.extensions["metrics"].render(gauges)
+    return Response(body, mimetype="text/plain; version=0.0.4")
 
-# Create database tables before the first request
-@app.before_request
-def create_tables():
-    db.create_all()
 
 # Register a new user
-@app.route("/register", methods=["POST"])
+@api.route("/register", methods=["POST"])
 def register():
-    data = request.get_json()
+    data = read_payload()
     # Validate input
     if not data or "username" not in data:
-        return jsonify({"error": "invalid input"}), 400
+        return respond({"error": "invalid input"}, 400)
 
     # Check if user already exists
     user = User.query.filter_by(username=data["username"]).first()
     if user:
-        return jsonify({"user_id": user.id})
+        return respond({"user_id": user.id})
 
     # Create new user
     user = User(username=data["username"])
     db.session.add(user)
     db.session.commit()
-    return jsonify({"user_id": user.id})
+    return respond({"user_id": user.id})
+
+# Read an optional client timestamp (uploads replayed later keep their original time)
+def parse_client_timestamp(data):
+    if not data.get("timestamp"):
+        return datetime.utcnow(), None
+    try:
+        return datetime.fromisoformat(data["timestamp"]), None
+    except (TypeError, ValueError):
+        return None, "invalid timestamp"
+
+# Read an optional idempotency key used to recognise replays of the same upload
+def parse_idempotency_key(data):
+    key = data.get("idempotency_key")
+    if key is None:
+        return None, None
+    if not isinstance(key, str) or not 0 < len(key) <= 64:
+        return None, "idempotency_key must be a string of at most 64 characters"
+    return key, None
+
+# Validate one test result payload and return (row, error)
+def validate_test_result(data):
+    if not isinstance(data, dict):
+        return None, "expected an object"
+    try:
+        row = {
+            "user_id": int(data["user_id"]),
+            "avg_time": float(data["avg_time"]),
+            "accuracy": float(data["accuracy"]),
+            "mode": str(data["mode"]),
+        }
+    except KeyError as e:
+        return None, f"missing field {e.args[0]}"
+    except (TypeError, ValueError):
+        return None, "invalid field type"
+    if not (math.isfinite(row["avg_time"]) and math.isfinite(row["accuracy"])):
+        return None, "avg_time and accuracy must be finite"
+    if len(row["mode"]) > 32:
+        return None, "mode too long"
+    row["timestamp"], error = parse_client_timestamp(data)
+    if error:
+        return None, error
+    key, error = parse_idempotency_key(data)
+    if error:
+        return None, error
+    if key:
+        row["idempotency_key"] = key
+    if data.get("meta") is not None:
+        row["meta"], error = validate_meta(data["meta"])
+        if error:
+            return None, error
+    if data.get("trajectory"):
+        trajectory, error = validate_trajectory(data["trajectory"])
+        if error:
+            return None, error
+        row["trajectory"] = trajectory
+    return row, None
+
+# Serialize optional client metadata (a JSON object) and return (text, error)
+def validate_meta(meta):
+    if not isinstance(meta, dict):
+        return None, "meta must be an object"
+    try:
+        text = json.dumps(meta, separators=(",", ":"))
+    except (TypeError, ValueError):
+        return None, "meta must be JSON-serializable"
+    if len(text) > current_app.config["MAX_META_BYTES"]:
+        return None, "meta too large"
+    return text, None
+
+# Check a zlib-compressed float32 trajectory (raw bytes or base64) and return (Trajectory fields, error)
+def validate_trajectory(encoded):
+    columns = current_app.config["TRAJECTORY_COLUMNS"]
+    row_size = 4 * len(columns)
+    try:
+        # MessagePack uploads carry the bytes directly, JSON uploads as base64
+        blob = encoded if isinstance(encoded, bytes) else base64.b64decode(encoded, validate=True)
+        # Bounded decompress so a tiny upload cannot expand without limit
+        decompressor = zlib.decompressobj()
+        raw = decompressor.decompress(blob, row_size * current_app.config["MAX_TRAJECTORY_SAMPLES"] + 1)
+    except (TypeError, binascii.Error, zlib.error):
+        return None, "invalid trajectory encoding"
+    if decompressor.unconsumed_tail or len(raw) % row_size:
+        return None, "trajectory too large or not whole samples"
+    return {"sample_count": len(raw) // row_size, "columns": ",".join(columns), "data": blob}, None
+
+# The write-behind queue when enabled, otherwise None
+def write_behind():
+    return current_app.extensions.get("write_behind")
+
+# Response for uploads turned away because the write-behind queue is full
+def queue_full():
+    response = respond({"error": "server busy, retry later"}, 503)
+    response.headers["Retry-After"] = "1"
+    return response
 
 # Upload test results
-@app.route("/upload_test", methods=["POST"])
+@api.route("/upload_test", methods=["POST"])
 def upload_test():
-    data = request.json
-    result = TestResult(**data)
-    db.session.add(result)
+    row, error = validate_test_result(read_payload())
+    if error:
+        return respond({"error": error}, 400)
+    if existing_keys(TestResult, [row.get("idempotency_key")]):
+        return respond({"status": "duplicate"})
+    if not db.session.query(User.id).filter(User.id == row["user_id"]).first():
+        return respond({"error": "unknown user_id"}, 400)
+    queue = write_behind()
+    if queue:
+        status = queue.submit("test", row)
+        if status == FULL:
+            return queue_full()
+        return respond({"status": status}, 202 if status == QUEUED else 200)
+    save_test_results([row])
     db.session.commit()
-    return jsonify({"status": "saved"})
+    return respond({"status": "saved"})
+
+# Upload many test results in one transaction
+@api.route("/upload_tests_batch", methods=["POST"])
+def upload_tests_batch():
+    items = read_payload()
+    if isinstance(items, dict):
+        items = items.get("results")
+    if not isinstance(items, list):
+        return respond({"error": "expected a list of results"}, 400)
+    max_batch_size = current_app.config["MAX_BATCH_SIZE"]
+    if len(items) > max_batch_size:
+        return respond({"error": f"batch larger than {max_batch_size}"}, 413)
+
+    # Validate every item, then check all referenced users with a single query
+    statuses, rows = [], []
+    for item in items:
+        row, error = validate_test_result(item)
+        statuses.append({"status": "invalid", "error": error} if error else None)
+        rows.append(row)
+    user_ids = {row["user_id"] for row in rows if row}
+    known_users = set()
+    if user_ids:
+        known_users = {uid for (uid,) in db.session.query(User.id).filter(User.id.in_(user_ids))}
+
+    # Replayed items (known idempotency key, or repeated within this batch) count as done
+    seen_keys = existing_keys(TestResult, [row.get("idempotency_key") for row in rows if row])
+
+    valid_rows = []
+    queue = write_behind()
+    for index, row in enumerate(rows):
+        if row is None:
+            continue
+        key = row.get("idempotency_key")
+        if key and key in seen_keys:
+            statuses[index] = {"status": "duplicate"}
+            continue
+        if key:
+            seen_keys.add(key)
+        if row["user_id"] not in known_users:
+            statuses[index] = {"status": "invalid", "error": "unknown user_id"}
+        elif not queue:
+            statuses[index] = {"status": "saved"}
+            valid_rows.append(row)
+        else:
+            status = queue.submit("test", row)
+            if status == FULL:
+                statuses[index] = {"status": "rejected", "error": "queue full"}
+            else:
+                statuses[index] = {"status": status}
+            if status == QUEUED:
+                valid_rows.append(row)
+
+    # One executemany insert and one commit for the whole batch
+    if valid_rows and not queue:
+        save_test_results(valid_rows)
+        db.session.commit()
+
+    for index, status in enumerate(statuses):
+        status["index"] = index
+    duplicates = sum(1 for status in statuses if status["status"] == "duplicate")
+    return respond({
+        "saved": len(valid_rows),
+        "duplicates": duplicates,
+        "failed": len(items) - len(valid_rows) - duplicates,
+        "results": statuses,
+    }, 202 if queue else 200)
+
+# Read a whole, non-negative count (an int or a string of digits)
+def parse_count(value):
+    if isinstance(value, bool) or not isinstance(value, (int, str)):
+        raise TypeError("expected an integer")
+    number = int(value)
+    if number < 0:
+        raise ValueError("expected a non-negative integer")
+    return number
+
+# Turn uploaded answers (rows or dicts) or a legacy CSV string into QuizAnswer rows
+def parse_quiz_answers(data):
+    answers = data.get("answers")
+    if answers is None and data.get("csv_data"):
+        if not isinstance(data["csv_data"], str):
+            raise TypeError("csv_data must be a string")
+        answers = list(csv.reader(io.StringIO(data["csv_data"])))[1:]
+    if answers is not None and not isinstance(answers, list):
+        raise TypeError("answers must be a list")
+    rows = []
+    for position, answer in enumerate(answers or []):
+        if isinstance(answer, dict):
+            answer = [answer.get("question"), answer.get("user_answer"),
+                      answer.get("correct_answer"), answer.get("is_correct")]
+        if not isinstance(answer, list) or len(answer) != 4:
+            raise ValueError("each answer needs question, your answer, correct answer and correctness")
+        question, user_answer, correct_answer, is_correct = answer
+        if not all(isinstance(text, str) for text in (question, user_answer, correct_answer)):
+            raise TypeError("question and answers must be strings")
+        if parse_count(is_correct) not in (0, 1):
+            raise ValueError("correctness must be 0 or 1")
+        rows.append({
+            "position": position,
+            "question": question,
+            "user_answer": user_answer,
+            "correct_answer": correct_answer,
+            "is_correct": bool(int(is_correct)),
+        })
+    return rows
+
+# Validate one quiz payload and return ((QuizResult fields, answer rows), error)
+def validate_quiz(data):
+    if not isinstance(data, dict):
+        return None, "expected an object"
+    try:
+        fields = {
+            "user_id": parse_count(data["user_id"]),
+            "score": parse_count(data["score"]),
+            "total_questions": parse_count(data["total_questions"]),
+        }
+    except KeyError as e:
+        return None, f"missing field {e.args[0]}"
+    except (TypeError, ValueError):
+        return None, "invalid field type"
+    if fields["score"] > fields["total_questions"]:
+        return None, "score larger than total_questions"
+    try:
+        answer_rows = parse_quiz_answers(data)
+    except (TypeError, ValueError) as e:
+        return None, f"invalid answers: {e}"
+    fields["timestamp"], error = parse_client_timestamp(data)
+    if error:
+        return None, error
+    fields["idempotency_key"], error = parse_idempotency_key(data)
+    if error:
+        return None, error
+    if not db.session.query(User.id).filter(User.id == fields["user_id"]).first():
+        return None, "unknown user_id"
+    return (fields, answer_rows), None
 
 # Upload quiz results
-@app.route("/upload_quiz", methods=["POST"])
+@api.route("/upload_quiz", methods=["POST"])
 def upload_quiz():
-    data = request.json
-    quiz = QuizResult(
-        user_id=data["user_id"],
-        score=data["score"],
-        total_questions=data["total_questions"],
-        csv_data=data.get("csv_data", "")
-    )
-    db.session.add(quiz)
+    quiz, error = validate_quiz(read_payload())
+    if error:
+        return respond({"error": error}, 400)
+    fields, answer_rows = quiz
+    if existing_keys(QuizResult, [fields["idempotency_key"]]):
+        return respond({"status": "duplicate"})
+
+    queue = write_behind()
+    if queue:
+        status = queue.submit("quiz", quiz)
+        if status == FULL:
+            return queue_full()
+        return respond({"status": status}, 202 if status == QUEUED else 200)
+    save_quiz(fields, answer_rows)
     db.session.commit()
-    return jsonify({"status": "saved"})
+    current_app.extensions["quiz_csv_cache"].invalidate(fields["user_id"])
+    return respond({"status": "saved"})
+
+# Raw trajectory bytes for one tracking result, served exactly as stored (hot or archived)
+@api.route("/results/<int:result_id>/trajectory", methods=["GET"])
+def get_trajectory(result_id):
+    trajectory = (
+        db.session.query(Trajectory.sample_count, Trajectory.columns, Trajectory.data)
+        .filter(Trajectory.test_result_id == result_id)
+        .first()
+    ) or find_archived_trajectory(result_id)
+    if not trajectory:
+        return jsonify({"error": "no trajectory for this result"}), 404
+    sample_count, columns, data = trajectory
+    return Response(data, mimetype="application/octet-stream", headers={
+        "X-Trajectory-Columns": columns,
+        "X-Trajectory-Samples": str(sample_count),
+        "X-Trajectory-Dtype": "<f4",
+        "X-Trajectory-Compression": "zlib",
+    })
+
+# Stream a whole table as CSV or NDJSON, optionally filtered and gzipped
+@api.route("/export", methods=["GET"])
+def export():
+    table = request.args.get("table", "test_result")
+    fmt = request.args.get("format", "csv")
+    if table not in EXPORT_TABLES or fmt not in FORMATS:
+        return jsonify({"error": f"table must be one of {list(EXPORT_TABLES)} and format one of {list(FORMATS)}"}), 400
+    try:
+        start, end = parse_when(request.args.get("start")), parse_when(request.args.get("end"))
+    except ValueError:
+        return jsonify({"error": "start and end must be ISO dates"}), 400
+    compress = request.args.get("gzip") in ("1", "true")
+    include_archived = request.args.get("archived", "1") not in ("0", "false")
+
+    stream = export_stream(table, fmt, compress, include_archived, mode=request.args.get("mode"),
+                           user_id=request.args.get("user_id", type=int), start=start, end=end)
+    filename = f"{table}.{fmt}" + (".gz" if compress else "")
+    mimetype = "application/gzip" if compress else ("text/csv" if fmt == "csv" else "application/x-ndjson")
+    return Response(stream_with_context(stream), mimetype=mimetype,
+                    headers={"Content-Disposition": f"attachment; filename={filename}"})
+
+# Write-behind queue depth and counters
+@api.route("/ingest_stats", methods=["GET"])
+def ingest_stats():
+    queue = write_behind()
+    if not queue:
+        return jsonify({"enabled": False})
+    return jsonify(dict(queue.stats(), enabled=True))
+
+# Mean, variance and extremes per mode, read from the rollup table
+@api.route("/stats", methods=["GET"])
+def stats():
+    query = db.session.query(
+        ResultRollup.mode,
+        func.sum(ResultRollup.count),
+        func.sum(ResultRollup.avg_time_sum), func.sum(ResultRollup.avg_time_sumsq),
+        func.min(ResultRollup.avg_time_min), func.max(ResultRollup.avg_time_max),
+        func.sum(ResultRollup.accuracy_sum), func.sum(ResultRollup.accuracy_sumsq),
+        func.min(ResultRollup.accuracy_min), func.max(ResultRollup.accuracy_max),
+    )
+    user_id = request.args.get("user_id", type=int)
+    if user_id is not None:
+        query = query.filter(ResultRollup.user_id == user_id)
+    if request.args.get("mode"):
+        query = query.filter(ResultRollup.mode == request.args["mode"])
+    try:
+        if request.args.get("start"):
+            query = query.filter(ResultRollup.day >= datetime.fromisoformat(request.args["start"]).date())
+        if request.args.get("end"):
+            query = query.filter(ResultRollup.day <= datetime.fromisoformat(request.args["end"]).date())
+    except ValueError:
+        return jsonify({"error": "start and end must be ISO dates"}), 400
+
+    modes = {}
+    for mode, count, *values in query.group_by(ResultRollup.mode):
+        modes[mode] = {
+            "count": count,
+            "avg_time": summarize(count, *values[0:4]),
+            "accuracy": summarize(count, *values[4:8]),
+        }
+    return jsonify(modes)
+
+# Stream the CSV for one quiz, one answer row at a time
+def generate_quiz_csv(quiz_id):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(QUIZ_CSV_HEADER)
+    answers = (
+        db.session.query(QuizAnswer.question, QuizAnswer.user_answer,
+                         QuizAnswer.correct_answer, QuizAnswer.is_correct)
+        .filter(QuizAnswer.quiz_result_id == quiz_id)
+        .order_by(QuizAnswer.position)
+        .yield_per(500)
+    )
+    for question, user_answer, correct_answer, is_correct in answers:
+        writer.writerow([question, user_answer, correct_answer, int(bool(is_correct))])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+# Pass generated chunks through, then cache the complete body once streaming finishes
+def cache_while_streaming(chunks, cache, user_id, etag, headers):
+    body = []
+    for chunk in chunks:
+        body.append(chunk)
+        yield chunk
+    cache.put(user_id, (etag, "".join(body).encode(), headers))
 
 # Get quiz CSV data for a user
-@app.route("/quiz_csv/<int:user_id>", methods=["GET"])
+@api.route("/quiz_csv/<int:user_id>", methods=["GET"])
 def get_quiz_csv(user_id):
     quiz = (
-        QuizResult.query.filter_by(user_id=user_id)
-        .order_by(QuizResult.timestamp.desc())
+        db.session.query(QuizResult.id, QuizResult.timestamp)
+        .filter(QuizResult.user_id == user_id)
+        .order_by(QuizResult.timestamp.desc(), QuizResult.id.desc())
         .first()
     )
-    if not quiz or not quiz.csv_data:
-        return jsonify({})
-    return jsonify({
-        "timestamp": quiz.timestamp.strftime("%Y-%m-%d %H:%M:%S"),
-        "csv_data": quiz.csv_data
-    })
+    if not quiz:
+        return "", 204
+
+    # The latest quiz's id and timestamp identify the CSV, so a match means nothing changed
+    etag = f"{quiz.id}-{int(quiz.timestamp.timestamp() * 1_000_000)}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    cache = current_app.extensions["quiz_csv_cache"]
+    cached = cache.get(user_id)
+    if cached and cached[0] == etag:
+        _, body, headers = cached
+    else:
+        headers = {"X-Quiz-Timestamp": quiz.timestamp.strftime("%Y-%m-%d %H:%M:%S")}
+        has_answers = db.session.query(QuizAnswer.id).filter_by(quiz_result_id=quiz.id).first() is not None
+        if has_answers:
+            body = stream_with_context(cache_while_streaming(generate_quiz_csv(quiz.id), cache,
+                                                             user_id, etag, headers))
+        else:
+            # Quizzes uploaded before answers were normalized still carry the whole CSV
+            csv_data = db.session.get(QuizResult, quiz.id).csv_data
+            if not csv_data:
+                return "", 204
+            body = csv_data.encode()
+            cache.put(user_id, (etag, body, headers))
+
+    response = Response(body, mimetype="text/csv", headers=headers)
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+# Encode the sort key of the last row on a page as an opaque cursor
+def encode_cursor(*values):
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+# Decode a cursor back into (sort value, row id), with parse() converting the sort value (None if malformed)
+def decode_cursor(cursor, parse):
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(key, list) or len(key) != 2 or type(key[1]) is not int:
+            return None
+        return parse(key[0]), key[1]
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return None
+
+# Sort value of a leaderboard cursor: a JSON number
+def cursor_number(value):
+    if type(value) not in (int, float):
+        raise TypeError("expected a number")
+    return value
+
+# Read the requested page size, clamped to the configured maximum
+def page_size():
+    limit = request.args.get("limit", current_app.config["DEFAULT_PAGE_SIZE"], type=int)
+    return max(1, min(limit, current_app.config["MAX_PAGE_SIZE"]))
+
+# Page through a user's test or quiz history, newest first
+@api.route("/users/<int:user_id>/history", methods=["GET"])
+def user_history(user_id):
+    kind = request.args.get("kind", "test")
+    model = {"test": TestResult, "quiz": QuizResult}.get(kind)
+    if model is None:
+        return jsonify({"error": "kind must be test or quiz"}), 400
+    limit = page_size()
+
+    # Walks the (user_id, timestamp) index from the cursor instead of using OFFSET
+    query = model.query.filter(model.user_id == user_id)
+    cursor = request.args.get("cursor")
+    if cursor:
+        key = decode_cursor(cursor, datetime.fromisoformat)
+        if key is None:
+            return jsonify({"error": "invalid cursor"}), 400
+        query = query.filter(tuple_(model.timestamp, model.id) < key)
+    rows = query.order_by(model.timestamp.desc(), model.id.desc()).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    if kind == "test":
+        items = [{"id": r.id, "mode": r.mode, "avg_time": r.avg_time, "accuracy": r.accuracy,
+                  "timestamp": r.timestamp.isoformat()} for r in rows]
+    else:
+        items = [{"id": r.id, "score": r.score, "total_questions": r.total_questions,
+                  "timestamp": r.timestamp.isoformat()} for r in rows]
+    next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id) if has_more else None
+    return jsonify({"items": items, "next_cursor": next_cursor})
+
+# Page through the best accuracy scores for one mode
+@api.route("/leaderboard", methods=["GET"])
+def leaderboard():
+    mode = request.args.get("mode")
+    if not mode:
+        return jsonify({"error": "mode is required"}), 400
+    limit = page_size()
+
+    # Walks the (mode, accuracy) index from the cursor instead of using OFFSET
+    query = (
+        db.session.query(TestResult, User.username)
+        .join(User, User.id == TestResult.user_id)
+        .filter(TestResult.mode == mode, TestResult.accuracy.isnot(None))
+    )
+    cursor = request.args.get("cursor")
+    if cursor:
+        key = decode_cursor(cursor, cursor_number)
+        if key is None:
+            return jsonify({"error": "invalid cursor"}), 400
+        query = query.filter(tuple_(TestResult.accuracy, TestResult.id) < key)
+    rows = query.order_by(TestResult.accuracy.desc(), TestResult.id.desc()).limit(limit + 1).all()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    items = [{"id": r.id, "user_id": r.user_id, "username": username, "accuracy": r.accuracy,
+              "avg_time": r.avg_time, "timestamp": r.timestamp.isoformat()} for r, username in rows]
+    next_cursor = encode_cursor(rows[-1][0].accuracy, rows[-1][0].id) if has_more else None
+    return jsonify({"items": items, "next_cursor": next_cursor})
@@ -0,0 +1,50 @@
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+
+class TimeoutRequestHandler(WSGIRequestHandler):
+    # werkzeug closes every connection after one response (Connection: close), so this only
+    # bounds how long a client that stalls mid-request can hold a worker, in seconds
+    timeout = 5
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    # werkzeug server that hands each connection to a fixed pool of worker threads
+    multithread = True
+
+    def __init__(self, host, port, app, threads):
+        super().__init__(host, port, app, handler=TimeoutRequestHandler)
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="worker")
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._process_request_thread, request, client_address)
+
+    def _process_request_thread(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+# Serve the app until SIGINT/SIGTERM, then stop accepting and drain in-flight requests
+def serve(app, host="127.0.0.1", port=5000, threads=8):
+    server = PooledWSGIServer(host, port, app, threads)
+
+    def request_shutdown(signum, frame):
+        # shutdown() blocks until serve_forever returns, so it must run on another thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGINT, request_shutdown)
+    signal.signal(signal.SIGTERM, request_shutdown)
+
+    print(f"Serving on http://{host}:{port} with {threads} worker threads")
+    server.serve_forever()
+    print("Shutting down, waiting for in-flight requests...")
+    server.executor.shutdown(wait=True)
+    for hook in app.extensions.get("shutdown_hooks", []):
+        hook()
+    print("Server stopped.")
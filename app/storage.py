@@ -0,0 +1,60 @@
+from sqlalchemy import event, inspect, text
+from app.models import db
+
+
+# Configure the engine, SQLite pragmas and schema for an app (runs once at startup)
+def init_storage(app):
+    uri = app.config["SQLALCHEMY_DATABASE_URI"]
+    is_sqlite = uri.startswith("sqlite")
+    in_memory = is_sqlite and (uri in ("sqlite://", "sqlite:///:memory:"))
+
+    # Pooled connections for file databases; in-memory SQLite keeps its own pool
+    if not in_memory and app.config.get("DB_POOL_SIZE"):
+        options = dict(app.config.get("SQLALCHEMY_ENGINE_OPTIONS", {}))
+        options.setdefault("pool_size", app.config["DB_POOL_SIZE"])
+        options.setdefault("max_overflow", app.config["DB_MAX_OVERFLOW"])
+        options.setdefault("pool_timeout", app.config["DB_POOL_TIMEOUT"])
+        options.setdefault("pool_pre_ping", True)
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"] = options
+
+    db.init_app(app)
+
+    with app.app_context():
+        pragmas = app.config.get("SQLITE_PRAGMAS") or {}
+        if is_sqlite and pragmas:
+            if in_memory:
+                pragmas = {k: v for k, v in pragmas.items() if k != "journal_mode"}
+            event.listen(db.engine, "connect", _pragma_listener(pragmas))
+        upgrade_schema()
+
+
+# Apply the configured pragmas to every new DBAPI connection
+def _pragma_listener(pragmas):
+    statements = [f"PRAGMA {name}={value}" for name, value in pragmas.items()]
+
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for statement in statements:
+            cursor.execute(statement)
+        cursor.close()
+
+    return set_pragmas
+
+
+# Create missing tables, then add any columns and indexes that older databases lack
+def upgrade_schema():
+    db.create_all()
+    inspector = inspect(db.engine)
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            existing_columns = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing_columns:
+                    continue
+                column_type = column.type.compile(dialect=db.engine.dialect)
+                conn.execute(text(f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {column_type}'))
+
+            existing_indexes = {ix["name"] for ix in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(bind=conn)
@@ -0,0 +1,73 @@
+import gzip
+import json
+import zlib
+from flask import Response, current_app, request
+from werkzeug.exceptions import RequestEntityTooLarge, UnsupportedMediaType
+
+try:
+    import msgpack
+except ImportError:  # optional: JSON is always available as the fallback
+    msgpack = None
+
+MSGPACK_TYPES = ("application/msgpack", "application/x-msgpack")
+# bodies that are already compressed are not worth gzipping again
+PRECOMPRESSED_TYPES = ("application/octet-stream", "application/gzip")
+
+
+# Decode the request body: gzip Content-Encoding, then MessagePack or JSON (None if unparseable)
+def read_payload():
+    body = request.get_data(cache=True)
+    if request.headers.get("Content-Encoding", "").lower() == "gzip":
+        limit = current_app.config["MAX_DECOMPRESSED_BODY"]
+        decompressor = zlib.decompressobj(31)
+        try:
+            body = decompressor.decompress(body, limit + 1)
+        except zlib.error:
+            return None
+        if len(body) > limit or decompressor.unconsumed_tail:
+            raise RequestEntityTooLarge()
+
+    if request.mimetype in MSGPACK_TYPES:
+        if msgpack is None:
+            raise UnsupportedMediaType("MessagePack is not installed on the server")
+        try:
+            return msgpack.unpackb(body, raw=False)
+        except (ValueError, msgpack.UnpackException):
+            return None
+    try:
+        return json.loads(body) if body else None
+    except ValueError:
+        return None
+
+
+# Whether the client explicitly asked for MessagePack ahead of JSON. Wildcards such as */*
+# (the default of requests, curl and browsers) do not count, so plain clients keep getting JSON.
+def wants_msgpack():
+    if msgpack is None:
+        return False
+    accept = request.accept_mimetypes
+    named = max((quality for mimetype, quality in accept if mimetype.lower() in MSGPACK_TYPES), default=0)
+    return named > accept["application/json"]
+
+
+# Encode a response body as MessagePack or JSON to match the request's Accept header
+def respond(obj, status=200):
+    if wants_msgpack():
+        return Response(msgpack.packb(obj), status=status, mimetype="application/msgpack")
+    return Response(json.dumps(obj), status=status, mimetype="application/json")
+
+
+# Gzip buffered responses above the size threshold for clients that accept it
+def compress_response(response):
+    if (response.direct_passthrough or response.is_streamed or response.status_code < 200
+            or response.status_code in (204, 304) or "Content-Encoding" in response.headers
+            or response.mimetype in PRECOMPRESSED_TYPES
+            or "gzip" not in request.headers.get("Accept-Encoding", "")):
+        return response
+    body = response.get_data()
+    if len(body) < current_app.config["GZIP_MIN_SIZE"]:
+        return response
+    response.set_data(gzip.compress(body, compresslevel=6))
+    response.headers["Content-Encoding"] = "gzip"
+    response.vary.add("Accept-Encoding")
+    return response
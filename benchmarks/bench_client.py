@@ -0,0 +1,63 @@
+"""
+bench_client.py
+---------------
+Measures per-call latency of the old module-level requests.get calls (a throwaway
+Session per call) against ApiClient's shared session. Starts the pooled server
+in-process on a temporary database. That server answers every request with
+Connection: close, so both arms open a TCP connection per call and the difference
+is client-side setup only; connection reuse needs a server that keeps connections alive.
+
+Usage: python -m benchmarks.bench_client [--calls 500]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+import requests
+
+from app import create_app
+from app.config import Config
+from app.server import PooledWSGIServer
+from frontend.api_client import ApiClient
+
+
+def time_calls(call, n):
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        call()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--port", type=int, default=5056)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(tmp, "bench.db")
+
+        server = PooledWSGIServer("127.0.0.1", args.port, create_app(BenchConfig), threads=4)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{args.port}"
+        client = ApiClient(base_url)
+        user_id = client.decode(client.post("/register", {"username": "bench"}))["user_id"]
+        path = f"/quiz_csv/{user_id}"
+
+        results = {
+            "requests.get": time_calls(lambda: requests.get(base_url + path), args.calls),
+            "shared session": time_calls(lambda: client.get(path), args.calls),
+        }
+        server.shutdown()
+
+    for label, latencies in results.items():
+        print(f"{label:<15} mean {statistics.mean(latencies):6.2f} ms  median {statistics.median(latencies):6.2f} ms")
+    saved = statistics.mean(results["requests.get"]) - statistics.mean(results["shared session"])
+    print(f"client overhead saved per call: {saved:.2f} ms")
@@ -0,0 +1,102 @@
+"""
+bench_server.py
+---------------
+Compares requests per second of the pooled production server against the
+old app.run(debug=True) server. Each mode runs run_server.py in a subprocess
+on a temporary database while client threads send a mix of /quiz_csv GETs
+and /upload_test POSTs.
+
+Usage: python -m benchmarks.bench_server [--clients 16] [--seconds 10] [--threads 8]
+"""
+
+import argparse
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Start run_server.py with the given flags and wait until it answers
+def start_server(port, db_path, extra_args):
+    env = dict(os.environ, DATABASE_URL="sqlite:///" + db_path)
+    proc = subprocess.Popen([sys.executable, "run_server.py", "--port", str(port), *extra_args],
+                            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                            start_new_session=True)
+    try:
+        for _ in range(100):
+            try:
+                requests.get(f"http://127.0.0.1:{port}/", timeout=1)
+                return proc
+            except requests.RequestException:
+                time.sleep(0.1)
+        raise RuntimeError("server did not start")
+    except BaseException:
+        stop_server(proc)
+        raise
+
+
+# Stop the server and any reloader child it spawned
+def stop_server(proc):
+    try:
+        os.killpg(proc.pid, signal.SIGTERM)
+    except ProcessLookupError:
+        pass  # already exited
+    proc.wait(timeout=10)
+
+
+# Hammer the server from several client threads and return (requests/s, errors)
+def drive(port, clients, seconds):
+    base = f"http://127.0.0.1:{port}"
+    user_id = requests.post(f"{base}/register", json={"username": "bench"}).json()["user_id"]
+    counts, errors = [0] * clients, [0] * clients
+    deadline = time.perf_counter() + seconds
+
+    def client(index):
+        session = requests.Session()
+        i = 0
+        while time.perf_counter() < deadline:
+            try:
+                if i % 4 == 0:
+                    r = session.post(f"{base}/upload_test", json={"user_id": user_id, "avg_time": 1.0,
+                                                                  "accuracy": 50.0, "mode": "normal"})
+                else:
+                    r = session.get(f"{base}/quiz_csv/{user_id}")
+                if r.status_code >= 400:
+                    errors[index] += 1
+            except requests.exceptions.RequestException:
+                errors[index] += 1
+            counts[index] += 1
+            i += 1
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return sum(counts) / (time.perf_counter() - start), sum(errors)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--port", type=int, default=5055)
+    args = parser.parse_args()
+
+    for label, flags in [("debug", ["--debug"]), ("pooled", ["--threads", str(args.threads)])]:
+        with tempfile.TemporaryDirectory() as tmp:
+            proc = start_server(args.port, os.path.join(tmp, "bench.db"), flags)
+            try:
+                rps, errors = drive(args.port, args.clients, args.seconds)
+            finally:
+                stop_server(proc)
+        print(f"{label:<7} {rps:8.1f} req/s  errors {errors}")
@@ -0,0 +1,52 @@
+"""
+bench_simulation.py
+-------------------
+Runs the headless models in frontend/simulation.py for every impairment level with
+scripted players and prints the score distribution per level, plus simulated
+session-steps per second. Useful for calibrating levels and catching scoring
+regressions without a display.
+
+Usage: python -m benchmarks.bench_simulation [--sessions 10000] [--seed 1]
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from app.config import Config
+from frontend.simulation import (TRACKING_LEVELS, simulate_balance, simulate_tracking,
+                                 simulate_typing)
+
+TYPING_TEXT = "coord reflex motor balance focus attention"
+
+
+def timed(call):
+    start = time.perf_counter()
+    value = call()
+    return value, time.perf_counter() - start
+
+
+def describe(scores):
+    return f"mean {np.mean(scores):6.2f}  std {np.std(scores):5.2f}  p5 {np.percentile(scores, 5):6.2f}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sessions", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    tracking_steps = round(Config.TRACKING_TEST_DURATION / Config.TRACKING_TIMESTEP)
+    balance_steps = round(Config.BALANCE_TEST_DURATION / Config.BALANCE_TIMESTEP)
+    print(f"{args.sessions} sessions per level, seed {args.seed}")
+    for level in TRACKING_LEVELS:
+        tracking, tracking_s = timed(lambda: simulate_tracking(level, args.sessions, seed=args.seed))
+        (balance, failed), balance_s = timed(lambda: simulate_balance(level, args.sessions, seed=args.seed))
+        typing, typing_s = timed(lambda: simulate_typing(level, TYPING_TEXT, args.sessions, seed=args.seed))
+        print(f"\n{level}")
+        print(f"  tracking  {describe(tracking)}  "
+              f"{args.sessions * tracking_steps / tracking_s / 1e6:5.1f}M session-steps/s")
+        print(f"  balance   {describe(balance)}  fell {failed.mean():6.1%}  "
+              f"{args.sessions * balance_steps / balance_s / 1e6:5.1f}M session-steps/s")
+        print(f"  typing    {describe(typing)}  {args.sessions / typing_s:8.0f} sessions/s")
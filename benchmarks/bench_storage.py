@@ -0,0 +1,92 @@
+"""
+bench_storage.py
+----------------
+Compares the old storage setup (db.create_all() on every request, default
+SQLite settings) with the startup-time schema + tuned SQLite engine.
+
+Usage: python -m benchmarks.bench_storage [--requests 500] [--writers 8] [--writes 100]
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from app import create_app
+from app.config import Config
+from app.models import db
+
+
+# Build an app on a fresh database file, optionally emulating the old setup
+def make_app(db_path, legacy):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = "sqlite:///" + db_path
+        if legacy:
+            SQLITE_PRAGMAS = {}
+            DB_POOL_SIZE = None
+
+    app = create_app(BenchConfig)
+    if legacy:
+        app.before_request(db.create_all)
+    return app
+
+
+# Time sequential GET requests and return latencies in ms
+def measure_latency(app, user_id, n):
+    client = app.test_client()
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        client.get(f"/quiz_csv/{user_id}")
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+# Run concurrent writers posting single results and return (rows/s, errors)
+def measure_writers(app, user_id, writers, writes):
+    errors = []
+
+    def writer():
+        client = app.test_client()
+        for _ in range(writes):
+            r = client.post("/upload_test", json={"user_id": user_id, "avg_time": 1.0,
+                                                  "accuracy": 50.0, "mode": "normal"})
+            if r.status_code != 200:
+                errors.append(r.status_code)
+
+    threads = [threading.Thread(target=writer) for _ in range(writers)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return (writers * writes - len(errors)) / elapsed, len(errors)
+
+
+def run(label, legacy, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        app = make_app(os.path.join(tmp, "bench.db"), legacy)
+        user_id = app.test_client().post("/register", json={"username": "bench"}).json["user_id"]
+        latencies = measure_latency(app, user_id, args.requests)
+        throughput, errors = measure_writers(app, user_id, args.writers, args.writes)
+        with app.app_context():
+            db.engine.dispose()
+
+    latencies.sort()
+    print(f"{label:<8} latency mean {statistics.mean(latencies):6.2f} ms  "
+          f"p95 {latencies[int(len(latencies) * 0.95)]:6.2f} ms  |  "
+          f"writers {throughput:8.1f} rows/s  errors {errors}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--writers", type=int, default=8)
+    parser.add_argument("--writes", type=int, default=100)
+    args = parser.parse_args()
+
+    run("before", True, args)
+    run("after", False, args)
@@ -0,0 +1,83 @@
+"""
+bench_wire.py
+-------------
+Compares request encodings for a batch of test results with tracking trajectories:
+JSON with base64 trajectories (the old format), JSON + gzip, MessagePack with raw
+bytes, and MessagePack + gzip. Prints payload size, client encode time and the
+server-side time to post the batch through the Flask test client.
+
+Usage: python -m benchmarks.bench_wire [--results 200] [--samples 3000] [--repeat 5]
+"""
+
+import argparse
+import base64
+import gzip
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+import zlib
+from array import array
+
+import msgpack
+
+from app import create_app
+from app.config import Config
+
+
+def make_results(n, samples):
+    results = []
+    for _ in range(n):
+        trajectory = array("f", (random.uniform(0, 600) for _ in range(samples * len(Config.TRAJECTORY_COLUMNS))))
+        results.append({"user_id": 1, "avg_time": random.uniform(0.2, 2.0), "accuracy": random.random(),
+                        "mode": "tracking", "trajectory": zlib.compress(trajectory.tobytes())})
+    return results
+
+
+def encoders(results):
+    as_base64 = [dict(r, trajectory=base64.b64encode(r["trajectory"]).decode("ascii")) for r in results]
+    return {
+        "json": (lambda: json.dumps(as_base64).encode(), "application/json", False),
+        "json+gzip": (lambda: gzip.compress(json.dumps(as_base64).encode(), 6), "application/json", True),
+        "msgpack": (lambda: msgpack.packb(results, use_bin_type=True), "application/msgpack", False),
+        "msgpack+gzip": (lambda: gzip.compress(msgpack.packb(results, use_bin_type=True), 6),
+                         "application/msgpack", True),
+    }
+
+
+def timed(call, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = call()
+        times.append((time.perf_counter() - start) * 1000)
+    return value, statistics.median(times)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--results", type=int, default=200)
+    parser.add_argument("--samples", type=int, default=3000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    results = make_results(args.results, args.samples)
+    with tempfile.TemporaryDirectory() as tmp:
+        class BenchConfig(Config):
+            SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(tmp, "bench.db")
+
+        test_client = create_app(BenchConfig).test_client()
+        test_client.post("/register", json={"username": "bench"})
+
+        print(f"{args.results} tracking results, {args.samples} samples each")
+        print(f"{'encoding':<14}{'size KB':>10}{'encode ms':>12}{'post ms':>10}")
+        for label, (encode, content_type, gzipped) in encoders(results).items():
+            body, encode_ms = timed(encode, args.repeat)
+            headers = {"Content-Encoding": "gzip"} if gzipped else {}
+            post = lambda: test_client.post("/upload_tests_batch", data=body, content_type=content_type,
+                                            headers=headers)
+            response, post_ms = timed(post, args.repeat)
+            assert response.status_code == 200, response.data
+            print(f"{label:<14}{len(body) / 1024:>10.1f}{encode_ms:>12.2f}{post_ms:>10.2f}")
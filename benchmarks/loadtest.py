@@ -0,0 +1,200 @@
+"""
+loadtest.py
+-----------
+Drives the API with N concurrent virtual users and a weighted request mix,
+then reports throughput and p50/p95/p99 latency per endpoint and writes the
+run to a JSON file so results can be compared over time.
+
+By default the app runs in-process through Flask's test client on a temporary
+database; pass --url to load-test a server started with run_server.py.
+
+Usage:
+    python -m benchmarks.loadtest --users 16 --duration 10
+    python -m benchmarks.loadtest --url http://127.0.0.1:5000 --mix upload_test=5,quiz_csv=5
+    python -m benchmarks.loadtest --compare data/loadtest-20250101-120000.json
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+DEFAULT_MIX = "register=1,upload_test=5,upload_quiz=1,quiz_csv=3"
+QUIZ_ANSWERS = [["Q1", "0.02", "0.02", 1], ["Q2", "0.04", "0.08", 0], ["Q3", "Judgment", "Judgment", 1]]
+
+
+class TestClientTransport:
+    # sends requests through Flask's in-process test client
+    def __init__(self, app):
+        self.client = app.test_client()
+
+    def get(self, path):
+        r = self.client.get(path)
+        return r.status_code, r.get_json(silent=True)
+
+    def post(self, path, payload):
+        r = self.client.post(path, json=payload)
+        return r.status_code, r.get_json(silent=True)
+
+
+class HttpTransport:
+    # sends requests to a running server over a keep-alive session
+    def __init__(self, base_url):
+        import requests
+        self.base_url = base_url.rstrip("/")
+        self.session = requests.Session()
+
+    def get(self, path):
+        r = self.session.get(self.base_url + path)
+        return r.status_code, None
+
+    def post(self, path, payload):
+        r = self.session.post(self.base_url + path, json=payload)
+        return r.status_code, r.json() if r.headers.get("Content-Type", "").startswith("application/json") else None
+
+
+# Parse "name=weight,..." into endpoint names and weights
+def parse_mix(text):
+    names, weights = [], []
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("register", "upload_test", "upload_quiz", "quiz_csv"):
+            raise SystemExit(f"unknown endpoint in mix: {name}")
+        names.append(name)
+        weights.append(float(weight or 1))
+    return names, weights
+
+
+# One virtual user: register once, then send weighted requests until the deadline
+def virtual_user(index, transport, names, weights, deadline, samples, seed):
+    rng = random.Random(seed + index)
+    username = f"vu{index}-{seed}"
+    _, body = transport.post("/register", {"username": username})
+    user_id = body["user_id"]
+
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        start = time.perf_counter()
+        if name == "register":
+            status, _ = transport.post("/register", {"username": username})
+        elif name == "upload_test":
+            status, _ = transport.post("/upload_test", {"user_id": user_id, "avg_time": rng.uniform(1, 15),
+                                                        "accuracy": rng.uniform(0, 100),
+                                                        "mode": rng.choice(["normal", "mild", "moderate", "severe"])})
+        elif name == "upload_quiz":
+            status, _ = transport.post("/upload_quiz", {"user_id": user_id, "score": 2, "total_questions": 3,
+                                                        "answers": QUIZ_ANSWERS})
+        else:
+            status, _ = transport.get(f"/quiz_csv/{user_id}")
+        samples[name].append(((time.perf_counter() - start) * 1000, status))
+
+
+# Nearest-rank percentile of a sorted list
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(samples, elapsed):
+    endpoints = {}
+    for name, entries in samples.items():
+        latencies = sorted(ms for ms, _ in entries)
+        endpoints[name] = {
+            "requests": len(entries),
+            "errors": sum(1 for _, status in entries if status >= 400),
+            "throughput": len(entries) / elapsed,
+            "mean_ms": sum(latencies) / len(latencies) if latencies else None,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+        }
+    total = sum(e["requests"] for e in endpoints.values())
+    return {"elapsed_s": elapsed, "requests": total, "throughput": total / elapsed, "endpoints": endpoints}
+
+
+def print_report(summary, previous=None):
+    print(f"{'endpoint':<12} {'reqs':>7} {'err':>5} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name, e in sorted(summary["endpoints"].items()):
+        line = (f"{name:<12} {e['requests']:>7} {e['errors']:>5} {e['throughput']:>9.1f} "
+                f"{e['p50_ms'] or 0:>8.2f} {e['p95_ms'] or 0:>8.2f} {e['p99_ms'] or 0:>8.2f}")
+        old = (previous or {}).get("endpoints", {}).get(name)
+        if old and old["p95_ms"]:
+            line += f"   p95 {100 * (e['p95_ms'] - old['p95_ms']) / old['p95_ms']:+.1f}% vs previous"
+        print(line)
+    print(f"{'total':<12} {summary['requests']:>7} {'':>5} {summary['throughput']:>9.1f}")
+
+
+def run(args):
+    names, weights = parse_mix(args.mix)
+    samples = {name: [] for name in names}
+
+    tmp = None
+    if args.url:
+        make_transport = lambda: HttpTransport(args.url)
+    else:
+        from app import create_app
+        from app.config import Config
+        tmp = tempfile.TemporaryDirectory()
+
+        class LoadTestConfig(Config):
+            SQLALCHEMY_DATABASE_URI = "sqlite:///" + os.path.join(tmp.name, "loadtest.db")
+            WRITE_BEHIND = args.write_behind
+
+        app = create_app(LoadTestConfig)
+        make_transport = lambda: TestClientTransport(app)
+
+    deadline = time.perf_counter() + args.duration
+    threads = [threading.Thread(target=virtual_user,
+                                args=(i, make_transport(), names, weights, deadline, samples, args.seed))
+               for i in range(args.users)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    if tmp:
+        for hook in app.extensions["shutdown_hooks"]:
+            hook()
+        tmp.cleanup()
+
+    return {
+        "started_at": datetime.now().isoformat(timespec="seconds"),
+        "config": {"users": args.users, "duration": args.duration, "mix": args.mix,
+                   "target": args.url or "test-client", "write_behind": args.write_behind, "seed": args.seed},
+        **summarize(samples, elapsed),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the backend API.")
+    parser.add_argument("--users", type=int, default=16, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=10, help="seconds to run")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="weighted endpoint mix, e.g. " + DEFAULT_MIX)
+    parser.add_argument("--url", help="base URL of a running server (default: in-process test client)")
+    parser.add_argument("--write-behind", action="store_true", help="enable write-behind for in-process runs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="result JSON path (default: data/loadtest-<time>.json)")
+    parser.add_argument("--compare", help="previous result JSON to compare p95 latency against")
+    args = parser.parse_args()
+
+    result = run(args)
+    previous = None
+    if args.compare:
+        with open(args.compare) as file:
+            previous = json.load(file)
+    print_report(result, previous)
+
+    output = args.output or os.path.join(DATA_DIR, f"loadtest-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as file:
+        json.dump(result, file, indent=2)
+    print(f"Saved results to {output}")
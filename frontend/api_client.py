@@ -1,42 +1,317 @@
+import base64
+import gzip
+import json
+import os
+import sys
+import time
+import zlib
+from datetime import datetime
 import requests
+from requests.adapters import HTTPAdapter
+from app.config import Config
+from frontend.journal import Journal, Replayer
 
-BASE_URL = "http://127.0.0.1:5000"
+try:
+    import msgpack
+except ImportError:  # optional: uploads fall back to JSON
+    msgpack = None
 
-# Register a new user and return the assigned user ID
+BASE_URL = Config.API_BASE_URL
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
+
+# Last quiz CSV downloaded per user, with its ETag, so repeat logins can revalidate
+QUIZ_CSV_CACHE_PATH = os.path.join(DATA_DIR, "quiz_csv_cache.json")
+
+# Every outgoing result is journaled here first and replayed until the server has it
+JOURNAL_PATH = os.path.join(DATA_DIR, "upload_journal.jsonl")
+
+# username -> user_id from the last successful registration, for offline sessions
+KNOWN_USERS_PATH = os.path.join(DATA_DIR, "users.json")
+
+# statuses worth retrying for idempotent calls: the request may not have been processed
+RETRY_STATUSES = {429, 502, 503, 504}
+# statuses that mean the server turned the request away unprocessed, so any call may be retried;
+# a 502/504 can arrive after the backend already applied a write
+REJECTED_STATUSES = {429, 503}
+
+
+class ApiClient:
+    # one pooled session with timeouts, shared by every backend call (connections are reused
+    # only when the server keeps them alive)
+    def __init__(self, base_url=BASE_URL, connect_timeout=Config.API_CONNECT_TIMEOUT,
+                 read_timeout=Config.API_READ_TIMEOUT, retries=Config.API_RETRIES,
+                 backoff=Config.API_BACKOFF, pool_size=4, encoding=None, gzip_min_size=Config.GZIP_MIN_SIZE):
+        self.base_url = base_url.rstrip("/")
+        # "msgpack" when the library is installed, otherwise "json"
+        self.encoding = encoding or ("msgpack" if msgpack else "json")
+        self.gzip_min_size = gzip_min_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    # Send a request with exponential backoff; idempotent calls (GETs, uploads carrying an
+    # idempotency key) are retried on connection errors, timeouts and 429/502/503/504, any other
+    # call only on 429/503
+    def request(self, method, path, idempotent=False, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        retry_statuses = RETRY_STATUSES if idempotent else REJECTED_STATUSES
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries
+            try:
+                r = self.session.request(method, self.base_url + path, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if not idempotent or last_attempt:
+                    raise
+                time.sleep(self.backoff * 2 ** attempt)
+                continue
+            if r.status_code not in retry_statuses or last_attempt:
+                return r
+            retry_after = r.headers.get("Retry-After", "")
+            time.sleep(float(retry_after) if retry_after.isdigit() else self.backoff * 2 ** attempt)
+
+    def get(self, path, **kwargs):
+        return self.request("GET", path, idempotent=True, **kwargs)
+
+    # Serialize a request body in the negotiated encoding, gzipping it when large enough
+    def encode(self, payload):
+        if self.encoding == "msgpack":
+            body = msgpack.packb(payload, use_bin_type=True)
+            headers = {"Content-Type": "application/msgpack", "Accept": "application/msgpack, application/json;q=0.9"}
+        else:
+            body = json.dumps(payload).encode()
+            headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        if len(body) >= self.gzip_min_size:
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+        return body, headers
+
+    # Parse a response body as MessagePack or JSON (requests already undid any gzip)
+    def decode(self, response):
+        if msgpack and response.headers.get("Content-Type", "").startswith("application/msgpack"):
+            return msgpack.unpackb(response.content, raw=False)
+        return response.json()
+
+    def post(self, path, payload, idempotent=False, **kwargs):
+        body, headers = self.encode(payload)
+        r = self.request("POST", path, idempotent=idempotent, data=body, headers=headers, **kwargs)
+        if r.status_code == 415 and self.encoding == "msgpack":
+            # backend without MessagePack support: use JSON from now on
+            self.encoding = "json"
+            return self.post(path, payload, idempotent, **kwargs)
+        return r
+
+    def close(self):
+        self.session.close()
+
+
+client = ApiClient()
+_session_username = None
+_replayer = None
+
+
+# Load the username -> user_id map (empty if missing or unreadable)
+def _known_users():
+    try:
+        with open(KNOWN_USERS_PATH, "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+def _remember_user(username, user_id):
+    users = _known_users()
+    if users.get(username) != user_id:
+        users[username] = user_id
+        os.makedirs(DATA_DIR, exist_ok=True)
+        with open(KNOWN_USERS_PATH, "w") as file:
+            json.dump(users, file)
+
+# Register a new user and return the assigned user ID (None if offline and never seen before)
 def register_user(username):
+    global _session_username
+    _session_username = username
     try:
-        r = requests.post(f"{BASE_URL}/register", json={"username": username})
-        data = r.json()
-        return data.get("user_id")
-    except Exception:
+        r = client.post("/register", {"username": username})
+        data = client.decode(r)
+        user_id = data.get("user_id")
+        _remember_user(username, user_id)
+        # the backend is reachable, so deliver anything journaled while it was not
+        get_replayer().wake()
+        return user_id
+    except requests.RequestException:
         from tkinter import messagebox
-        messagebox.showerror("Server Error", "Unable to contact backend. Is Flask running?")
-        raise
+        messagebox.showwarning("Working Offline",
+                               "Unable to contact backend. Results will be saved on this computer "
+                               "and uploaded when the backend is reachable.")
+        return _known_users().get(username)
+
+# Fill in user_id for records journaled before the user could be registered
+def _resolve_user(payload):
+    if payload.get("user_id") is not None:
+        return payload
+    username = payload["username"]
+    user_id = _known_users().get(username)
+    if user_id is None:
+        r = client.post("/register", {"username": username})
+        try:
+            user_id = client.decode(r)["user_id"] if r.ok else None
+        except (KeyError, TypeError, ValueError):
+            user_id = None
+        if user_id is None:
+            # an error page rather than a user id: wait for the backend like when it is unreachable
+            raise requests.RequestException(f"registering {username} failed with HTTP {r.status_code}")
+        _remember_user(username, user_id)
+    return dict(payload, user_id=user_id)
+
+# MessagePack can carry the journaled base64 trajectory as raw bytes
+def _wire_payload(payload, key):
+    payload = dict(_resolve_user(payload), idempotency_key=key)
+    if client.encoding == "msgpack" and isinstance(payload.get("trajectory"), str):
+        payload["trajectory"] = base64.b64decode(payload["trajectory"])
+    return payload
+
+# Send journaled records in order and return how many leading records are done with
+# (delivered, already delivered, or permanently rejected); stops at the first one that must wait
+def _send_journal_batch(records):
+    done = 0
+    try:
+        while done < len(records):
+            record = records[done]
+            if record is None:
+                done += 1
+                continue
+            if record["kind"] == "quiz":
+                r = client.post("/upload_quiz", _wire_payload(record["payload"], record["key"]), idempotent=True)
+                if r.status_code >= 500 or r.status_code == 429:
+                    return done
+                if r.status_code >= 400:
+                    print(f"Dropping quiz upload rejected by the backend: {r.text}")
+                done += 1
+                continue
+
+            # consecutive test results go up together in one batch request
+            run = []
+            while done + len(run) < len(records):
+                next_record = records[done + len(run)]
+                if next_record is None or next_record["kind"] != "test":
+                    break
+                run.append(_wire_payload(next_record["payload"], next_record["key"]))
+            # every journaled record carries an idempotency key, so the batch is safe to repeat
+            r = client.post("/upload_tests_batch", run, idempotent=True)
+            if r.status_code >= 500 or r.status_code == 429:
+                return done
+            if r.status_code >= 400:
+                print(f"Dropping test uploads rejected by the backend: {r.text}")
+                done += len(run)
+                continue
+            for status in client.decode(r)["results"]:
+                if status["status"] == "rejected":
+                    return done
+                if status["status"] == "invalid":
+                    print(f"Dropping invalid test upload: {status.get('error')}")
+                done += 1
+    except requests.RequestException:
+        pass
+    return done
+
+# The shared journal replayer, created on first use
+def get_replayer():
+    global _replayer
+    if _replayer is None:
+        _replayer = Replayer(Journal(JOURNAL_PATH), _send_journal_batch)
+        _replayer.start()
+    return _replayer
 
-# Upload test results to the backend
-def upload_test(user_id, avg_time, accuracy, mode):
+# Journal a record, then try to deliver the journal; raises OfflineError if it has to wait
+def _journal_and_send(kind, payload):
+    if payload.get("user_id") is None:
+        payload["username"] = _session_username
+    payload["timestamp"] = datetime.utcnow().isoformat()
+    replayer = get_replayer()
+    replayer.journal.append(kind, payload)
+    replayer.flush()
+
+# Make sure journaled records are on disk before the app exits
+def shutdown():
+    if _replayer is not None:
+        _replayer.journal.close()
+
+# Pack an array('f') of trajectory samples as base64 zlib-compressed little-endian float32
+def pack_trajectory(samples):
+    if sys.byteorder == "big":
+        samples = samples[:]
+        samples.byteswap()
+    return base64.b64encode(zlib.compress(samples.tobytes())).decode("ascii")
+
+# Upload test results to the backend (journaled first), with the raw tracking trajectory if there
+# is one and optional metadata such as frame timing
+def upload_test(user_id, avg_time, accuracy, mode, trajectory=None, meta=None):
     payload = {"user_id": user_id, "avg_time": avg_time, "accuracy": accuracy, "mode": mode}
-    requests.post(f"{BASE_URL}/upload_test", json=payload)
+    if trajectory:
+        payload["trajectory"] = pack_trajectory(trajectory)
+    if meta:
+        payload["meta"] = meta
+    _journal_and_send("test", payload)
 
-# Upload quiz results to the backend
-def upload_quiz(user_id, score, total_questions, csv_data=""):
+# Upload several test results in one request and return per-item statuses
+def upload_tests_batch(results):
+    r = client.post("/upload_tests_batch", results)
+    return client.decode(r)
+
+# Upload quiz results, journaled first (answers as [question, your answer, correct answer, correct?] rows)
+def upload_quiz(user_id, score, total_questions, csv_data="", answers=None):
     payload = {
         "user_id": user_id,
         "score": score,
         "total_questions": total_questions,
-        "csv_data": csv_data
     }
-    requests.post(f"{BASE_URL}/upload_quiz", json=payload)
+    if answers is not None:
+        payload["answers"] = answers
+    else:
+        payload["csv_data"] = csv_data
+    _journal_and_send("quiz", payload)
 
-# Get latest quiz CSV from backend
+# Load the local quiz CSV copies (empty if missing or unreadable)
+def _load_quiz_csv_cache():
+    try:
+        with open(QUIZ_CSV_CACHE_PATH, "r") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+# Save the local quiz CSV copies
+def _save_quiz_csv_cache(cache):
+    os.makedirs(os.path.dirname(QUIZ_CSV_CACHE_PATH), exist_ok=True)
+    with open(QUIZ_CSV_CACHE_PATH, "w") as file:
+        json.dump(cache, file)
+
+# Get latest quiz CSV from backend, reusing the local copy when the server answers 304
 def get_quiz_csv(user_id):
+    if user_id is None:
+        return {}
+    cache = _load_quiz_csv_cache()
+    cached = cache.get(str(user_id))
+    headers = {"If-None-Match": cached["etag"]} if cached else {}
     try:
-        r = requests.get(f"{BASE_URL}/quiz_csv/{user_id}")
-        if r.status_code == 200:
-            return r.json()
+        r = client.get(f"/quiz_csv/{user_id}", headers=headers)
+        if r.status_code == 304 and cached:
+            return {"timestamp": cached["timestamp"], "csv_data": cached["csv_data"]}
+        if r.status_code == 200 and r.text:
+            data = {"timestamp": r.headers.get("X-Quiz-Timestamp"), "csv_data": r.text}
+            if r.headers.get("ETag"):
+                cache[str(user_id)] = dict(data, etag=r.headers["ETag"])
+                _save_quiz_csv_cache(cache)
+            return data
         else:
             return {}
     except Exception:
+        if cached:
+            # offline: fall back to the last copy downloaded
+            return {"timestamp": cached["timestamp"], "csv_data": cached["csv_data"]}
         from tkinter import messagebox
         messagebox.showerror("Server Error", "Unable to fetch quiz CSV from backend.")
         return {}
@@ -0,0 +1,115 @@
+"""
+assets.py
+---------
+Registry of the JSON assets under assets/. Paths are resolved relative to the package,
+not the working directory. Each asset is parsed, validated and compiled into the
+structure its users need on first use, then cached. It is reloaded only when the file's
+modification time changes, so edits are picked up without a restart.
+"""
+
+import json
+import os
+import threading
+
+import numpy as np
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets")
+
+# radio buttons shown per quiz question
+QUIZ_CHOICES = 3
+
+
+class AssetError(ValueError):
+    pass
+
+
+class Asset:
+    # one JSON file and the function that validates and compiles its parsed content
+    def __init__(self, path, compile):
+        self.path = path
+        self.compile = compile
+        self.mtime = None
+        self.value = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        mtime = os.stat(self.path).st_mtime_ns
+        if mtime != self.mtime:
+            with self.lock:
+                if mtime != self.mtime:
+                    with open(self.path, "r", encoding="utf-8") as file:
+                        try:
+                            data = json.load(file)
+                        except ValueError as e:
+                            raise AssetError(f"{self.path}: invalid JSON ({e})") from e
+                    self.value = self.compile(data)
+                    self.mtime = mtime
+        return self.value
+
+
+class AssetRegistry:
+    def __init__(self, directory=ASSETS_DIR):
+        self.directory = directory
+        self.assets = {}
+
+    def register(self, name, filename, compile):
+        self.assets[name] = Asset(os.path.join(self.directory, filename), compile)
+
+    def get(self, name):
+        return self.assets[name].get()
+
+
+class KeyboardNeighbors:
+    # QWERTY neighbours as a dict of tuples, plus read-only lookup arrays for the vectorized typo model
+    def __init__(self, neighbors):
+        self.neighbors = neighbors
+        width = max((len(chars) for chars in neighbors.values()), default=1)
+        self.table = np.zeros((256, width), dtype=np.uint8)
+        self.counts = np.zeros(256, dtype=np.intp)
+        for key, chars in neighbors.items():
+            if ord(key) < 128:
+                self.table[ord(key), :len(chars)] = [ord(c) for c in chars]
+                self.counts[ord(key)] = len(chars)
+        self.table.flags.writeable = False
+        self.counts.flags.writeable = False
+
+
+# Keyboard neighbours, checked and compiled into KeyboardNeighbors
+def compile_neighbors(data):
+    if not isinstance(data, dict):
+        raise AssetError("qwerty_neighbors: expected an object of key -> neighbour list")
+    neighbors = {}
+    for key, chars in data.items():
+        if len(key) != 1 or not isinstance(chars, list) or not all(isinstance(c, str) and len(c) == 1 for c in chars):
+            raise AssetError(f"qwerty_neighbors: {key!r} must map one character to a list of characters")
+        neighbors[key] = tuple(chars)
+    return KeyboardNeighbors(neighbors)
+
+
+# Quiz questions as (prompt, choices, answer) tuples
+def compile_quiz_questions(data):
+    if not isinstance(data, list) or not data:
+        raise AssetError("quiz_question_data: expected a non-empty list of questions")
+    questions = []
+    for i, q in enumerate(data):
+        if (not isinstance(q, dict) or not isinstance(q.get("prompt"), str)
+                or not isinstance(q.get("choices"), list) or len(q["choices"]) != QUIZ_CHOICES
+                or not all(isinstance(c, str) for c in q["choices"])
+                or not isinstance(q.get("answer"), int) or not 0 <= q["answer"] < QUIZ_CHOICES):
+            raise AssetError(f"quiz_question_data: question {i} needs a prompt, {QUIZ_CHOICES} string "
+                             f"choices and an answer index")
+        questions.append((q["prompt"], tuple(q["choices"]), q["answer"]))
+    return tuple(questions)
+
+
+registry = AssetRegistry()
+registry.register("qwerty_neighbors", "qwerty_neighbors.json", compile_neighbors)
+registry.register("quiz_questions", "quiz_question_data.json", compile_quiz_questions)
+
+
+def qwerty_neighbors():
+    return registry.get("qwerty_neighbors")
+
+
+def quiz_questions():
+    return registry.get("quiz_questions")
@@ -1,12 +1,18 @@
 import tkinter as tk
 from tkinter import messagebox
-import random, math, time
+import math, time
 from frontend.api_client import upload_test
+from frontend.upload_worker import worker as upload_worker
 from app.config import Config
 from frontend.learn_popup import show_learn_popup
+from frontend.sim_clock import SimulationClock
+from frontend.frame_scheduler import FrameScheduler
+from frontend.simulation import BALANCE_KEYS, BalanceSession
+from frontend.recording import InputRecorder, new_seed
+from frontend.stream_stats import RingBuffer
 
 # runs the game and sets the default impairment level to be normal
-def run_balance_game(root, user_id, mode="normal"):
+def run_balance_game(root, user_id, mode="normal", seed=None):
     # create window for the game
     balance_window = tk.Toplevel(root)
     balance_window.title(f"Balance Game ({mode.capitalize()})")
@@ -18,18 +24,19 @@ def run_balance_game(root, user_id, mode="normal"):
     canvas = tk.Canvas(balance_window, width=W, height=H, bg="white")
     canvas.pack()
 
-    # impairment levels and effects
-    levels = {
-        "normal": {"gravity": 0.2, "tap_power": 5},
-        "mild": {"gravity": 0.4, "tap_power": 4},
-        "moderate": {"gravity": 0.6, "tap_power": 3},
-        "severe": {"gravity": 0.8, "tap_power": 2},
-    }
-    gravity, tap_power = levels.get(mode, levels["normal"]).values()
+    # one frame loop for the window; bar updates go through the dirty-tracking canvas
+    scheduler = FrameScheduler(balance_window)
+    frame_canvas = scheduler.canvas(canvas)
+
+    # gravity, tap strength and scoring for this impairment level come from the shared simulation session
+    session = BalanceSession(mode)
+    model = session.model
+    # balance has no randomness, but the seed is kept so every recording has one
+    recorder = InputRecorder("balance", mode, new_seed() if seed is None else seed)
 
     # setup the game
-    angle, score, running = 0, 0, False
-    fail_limit = 70
+    running = False
+    fail_limit = model.fail_limit
     time_left = Config.BALANCE_TEST_DURATION
 
     # create the timer
@@ -47,42 +54,58 @@ def run_balance_game(root, user_id, mode="normal"):
     bar_length = 120
     bar = canvas.create_line(W/2, H/2, W/2, H/2 - bar_length, width=10, fill="blue")
 
-    # redraws the bar based on the angle
-    def draw_bar():
+    # reaction latency from drift onset (the bar leaning past the dead zone) to the next corrective
+    # key press, in ms, kept in a preallocated buffer
+    latencies = RingBuffer(Config.BALANCE_LATENCY_CAPACITY)
+    drift_onset = None
+
+    # redraws the bar part way between the last two simulated angles
+    def draw_bar(alpha=1.0):
+        shown_angle = float(model.prev_angle[0] + (model.angle[0] - model.prev_angle[0]) * alpha)
         x1, y1 = W/2, H/2
-        x2 = x1 + bar_length * math.sin(math.radians(angle))
-        y2 = y1 - bar_length * math.cos(math.radians(angle))
-        canvas.coords(bar, x1, y1, x2, y2)
-        tilt = abs(angle) / fail_limit
+        x2 = x1 + bar_length * math.sin(math.radians(shown_angle))
+        y2 = y1 - bar_length * math.cos(math.radians(shown_angle))
+        frame_canvas.coords(bar, x1, y1, x2, y2)
+        tilt = abs(shown_angle) / fail_limit
         color = "blue" if tilt < 0.5 else ("orange" if tilt < 0.8 else "red")
-        canvas.itemconfig(bar, fill=color)
+        frame_canvas.itemconfig(bar, fill=color)
 
-    # changes the angle that gets used to redraw the bar
+    # changes the angle by one fixed timestep and counts the timer down in simulated time
     def sway():
-        nonlocal angle, score, running
-        if not running:
-            return
-        angle += gravity * (1 if angle > 0 else -1)
-        angle = max(-90, min(90, angle))
-        draw_bar()
-        if abs(angle) >= fail_limit:
+        nonlocal time_left, drift_onset
+        if session.step():
+            draw_bar()
             fail_game()
             return
-        score += max(0, fail_limit - abs(angle))
-        balance_window.after(50, sway)
+        if drift_onset is None and abs(model.prev_angle[0]) < Config.BALANCE_DRIFT_THRESHOLD <= abs(model.angle[0]):
+            # when this step was due, not when a late frame got round to running it
+            drift_onset = clock.step_time
+
+        # the timer follows the simulation clock so every machine gets the same game length
+        seconds_left = max(0, math.ceil(Config.BALANCE_TEST_DURATION - clock.elapsed))
+        if seconds_left != time_left:
+            time_left = seconds_left
+            timer_label.config(text=f"Time: {time_left}")
+        if clock.elapsed >= Config.BALANCE_TEST_DURATION:
+            end_game()
+
+    clock = SimulationClock(scheduler, sway, draw_bar, Config.BALANCE_TIMESTEP)
 
     # Makes it so that the left and right arrow keys can move the bar
     def on_press(event):
-        nonlocal angle
+        nonlocal drift_onset
+        pressed_at = time.perf_counter()
         if not running:
             return
-        if event.keysym == "Left":
-            angle -= tap_power
-        elif event.keysym == "Right":
-            angle += tap_power
-        angle = max(-90, min(90, angle))
+        if event.keysym not in BALANCE_KEYS:
+            return
+        recorder.key(clock.ticks, event.keysym, event.char)
+        if drift_onset is not None and BALANCE_KEYS[event.keysym] * model.angle[0] < 0:
+            latencies.append((pressed_at - drift_onset) * 1000)
+            drift_onset = None
+        fell = session.key(event.keysym)
         draw_bar()
-        if abs(angle) >= fail_limit:
+        if fell:
             fail_game()
 
     # If bar reaches a certain threshold the player fails
@@ -91,24 +114,46 @@ def run_balance_game(root, user_id, mode="normal"):
         if not running:
             return
         running = False
+        clock.stop()
+        # show the fallen bar behind the dialog
+        frame_canvas.flush()
+        recorder.end(clock.ticks, session.score())
+        recorder.save()
         messagebox.showwarning("You Fell!", "You lost your balance!")
         show_learn_popup(root, "balance")
         balance_window.destroy()
 
+    # time-integrated score and reaction latencies for the upload metadata
+    def balance_summary():
+        return {
+            "margin_integral_deg_s": round(float(model.margin_integral[0]), 3),
+            "elapsed_s": round(clock.elapsed, 3),
+            "dropped_s": round(clock.dropped, 3),
+            "drift_threshold_deg": Config.BALANCE_DRIFT_THRESHOLD,
+            "keypress_latency_ms": {k: round(v, 1) for k, v in latencies.summary().items()},
+            "latencies_ms": [round(v, 1) for v in latencies.values()],
+        }
+
     # ends the game and opens the learning window
     def end_game():
         nonlocal running
         if not running:
             return
         running = False
-        accuracy = score / 500
-        upload_test(user_id, Config.BALANCE_TEST_DURATION, accuracy, mode)
-        messagebox.showinfo("Balance Results", f"Balance accuracy: {accuracy:.1f}")
+        clock.stop()
+        accuracy = session.score()
+        recorder.end(clock.ticks, accuracy)
+        recorder.save()
+        upload_worker.submit("Balance game result", upload_test,
+                             user_id, Config.BALANCE_TEST_DURATION, accuracy, mode,
+                             meta={"frame_timing": scheduler.summary(), "balance": balance_summary()})
+        messagebox.showinfo("Balance Results", f"Balance accuracy: {accuracy:.1f}%")
         show_learn_popup(root, "balance")
         balance_window.destroy()
 
     # restarts the game
     def reset_game():
+        clock.stop()
         balance_window.destroy()
         run_balance_game(root, user_id, mode)
 
@@ -120,26 +165,15 @@ def run_balance_game(root, user_id, mode="normal"):
     tk.Button(button_frame, text="End Test", command=end_game,
               bg=Config.PRIMARY_COLOR, fg="white", relief="flat", width=10).pack(side="left", padx=5)
 
-    # counts the timer down
-    def update_timer():
-        nonlocal time_left, running
-        if not running:
-            return
-        if time_left > 0:
-            time_left -= 1
-            timer_label.config(text=f"Time: {time_left}")
-            balance_window.after(1000, update_timer)
-        else:
-            end_game()
-
     # start the game
     balance_window.bind("<KeyPress>", on_press)
     draw_bar()
+    scheduler.start()
 
     # give instructions to the user before the game starts
     messagebox.showinfo("How to Play", "Press the right and left arrow keys to balance the bar")
     balance_window.lift()
     balance_window.focus_force()
     running = True
-    sway()
-    update_timer()
+    recorder.start()
+    clock.start()
@@ -0,0 +1,189 @@
+import bisect
+import time
+from app.config import Config
+from frontend.stream_stats import StreamingStats
+
+# upper bounds (ms) of the frame interval histogram buckets; the last bucket is open-ended
+FRAME_HISTOGRAM_EDGES_MS = (8, 12, 17, 20, 25, 33, 50, 100)
+
+
+class FrameTimer:
+    # frame intervals, callback run times and missed deadlines for one animation loop, kept as
+    # streaming stats and a fixed histogram so long runs cost no extra memory
+    def __init__(self, frame_ms, edges_ms=FRAME_HISTOGRAM_EDGES_MS):
+        self.frame_ms = frame_ms
+        # a frame that arrives this late has visibly stuttered
+        self.deadline_ms = frame_ms * 1.5
+        self.edges_ms = edges_ms
+        self.counts = [0] * (len(edges_ms) + 1)
+        self.intervals = StreamingStats()
+        self.callbacks = StreamingStats()
+        self.missed = 0
+        self.catch_up_frames = 0
+        self.dropped_ms = 0.0
+
+    def record(self, interval_ms, callback_ms):
+        self.intervals.add(interval_ms)
+        self.callbacks.add(callback_ms)
+        self.counts[bisect.bisect_left(self.edges_ms, interval_ms)] += 1
+        if interval_ms > self.deadline_ms:
+            self.missed += 1
+
+    # Simulation steps run in one frame, and backlog dropped instead of caught up
+    def record_steps(self, steps, dropped_ms):
+        if steps > 1:
+            self.catch_up_frames += 1
+        self.dropped_ms += dropped_ms
+
+    # Compact summary for upload metadata; "degraded" flags runs too stuttery to compare
+    def summary(self):
+        frames = self.intervals.count
+        missed_ratio = self.missed / frames if frames else 0.0
+        rounded = lambda stats: {k: round(v, 2) for k, v in stats.summary().items() if k != "count"}
+        return {
+            "frames": frames,
+            "target_ms": self.frame_ms,
+            "interval_ms": rounded(self.intervals),
+            "callback_ms": rounded(self.callbacks),
+            "missed": self.missed,
+            "missed_ratio": round(missed_ratio, 4),
+            "catch_up_frames": self.catch_up_frames,
+            "dropped_ms": round(self.dropped_ms, 1),
+            "histogram": {"edges_ms": list(self.edges_ms), "counts": self.counts},
+            "degraded": missed_ratio > Config.DEGRADED_FRAME_RATIO or self.dropped_ms > 0,
+        }
+
+
+class DirtyCanvas:
+    # collects the coords and options wanted for canvas items during a frame and, on flush(),
+    # sends Tk only the ones that differ from what was last sent
+    def __init__(self, canvas, precision=1):
+        self.canvas = canvas
+        self.precision = precision
+        self.sent_coords = {}
+        self.sent_options = {}
+        self.pending_coords = {}
+        self.pending_options = {}
+        self.calls = 0
+        self.skipped = 0
+
+    def coords(self, item, *coords):
+        self.pending_coords[item] = tuple(round(float(c), self.precision) for c in coords)
+
+    def itemconfig(self, item, **options):
+        self.pending_options.setdefault(item, {}).update(options)
+
+    # Forget what was sent for an item (or all items), e.g. after deleting or recreating it
+    def forget(self, item=None):
+        for cache in (self.sent_coords, self.sent_options, self.pending_coords, self.pending_options):
+            if item is None:
+                cache.clear()
+            else:
+                cache.pop(item, None)
+
+    def flush(self):
+        for item, coords in self.pending_coords.items():
+            if self.sent_coords.get(item) == coords:
+                self.skipped += 1
+                continue
+            self.canvas.coords(item, *coords)
+            self.sent_coords[item] = coords
+            self.calls += 1
+        for item, options in self.pending_options.items():
+            sent = self.sent_options.setdefault(item, {})
+            changed = {k: v for k, v in options.items() if sent.get(k) != v}
+            if not changed:
+                self.skipped += 1
+                continue
+            self.canvas.itemconfig(item, **changed)
+            sent.update(changed)
+            self.calls += 1
+        self.pending_coords.clear()
+        self.pending_options.clear()
+
+
+class FrameScheduler:
+    # the single after() chain of one window: each tick runs due one-shot timers, then every
+    # per-frame callback, then flushes the window's DirtyCanvases. Stops when the window is destroyed.
+    def __init__(self, window, frame_ms=Config.FRAME_INTERVAL_MS):
+        self.window = window
+        self.frame_ms = frame_ms
+        self.callbacks = []
+        self.timers = []
+        self.canvases = []
+        self.timing = FrameTimer(frame_ms)
+        self.running = False
+        self._after_id = None
+        self._last_frame = None
+        window.bind("<Destroy>", self._on_destroy, add="+")
+
+    # Run callback(now) on every frame until removed
+    def add(self, callback):
+        self.callbacks.append(callback)
+
+    def remove(self, callback):
+        if callback in self.callbacks:
+            self.callbacks.remove(callback)
+
+    # Run func() once, on the first frame at least `seconds` from now
+    def call_later(self, seconds, func):
+        self.timers.append((time.perf_counter() + seconds, func))
+
+    # Wrap a tk.Canvas so its item updates are batched into this scheduler's frames
+    def canvas(self, canvas):
+        dirty = DirtyCanvas(canvas)
+        self.canvases.append(dirty)
+        return dirty
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            self._after_id = self.window.after(self.frame_ms, self._frame)
+
+    def stop(self):
+        self.running = False
+        if self._after_id is not None:
+            try:
+                self.window.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+    # Frame timing plus how many canvas calls the dirty tracking sent and skipped
+    def summary(self):
+        return dict(self.timing.summary(),
+                    canvas_calls=sum(c.calls for c in self.canvases),
+                    canvas_skipped=sum(c.skipped for c in self.canvases))
+
+    def _on_destroy(self, event):
+        # child widgets' Destroy events reach the window's bindings too
+        if event.widget is self.window:
+            self.stop()
+
+    def _frame(self):
+        self._after_id = None
+        if not self.running:
+            return
+        now = time.perf_counter()
+
+        if self.timers:
+            due = [timer for timer in self.timers if timer[0] <= now]
+            self.timers = [timer for timer in self.timers if timer[0] > now]
+            for _, func in due:
+                func()
+                if not self.running:
+                    return
+
+        animating = bool(self.callbacks)
+        for callback in list(self.callbacks):
+            callback(now)
+            if not self.running:
+                return
+        for canvas in self.canvases:
+            canvas.flush()
+
+        # only animated frames count towards frame timing (not countdowns or idle frames)
+        if animating and self._last_frame is not None:
+            self.timing.record((now - self._last_frame) * 1000, (time.perf_counter() - now) * 1000)
+        self._last_frame = now if animating else None
+        self._after_id = self.window.after(self.frame_ms, self._frame)
@@ -0,0 +1,167 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+
+# Cut a partially written last line left by a crash, so the next append starts on a line of its own
+def _drop_torn_tail(path, chunk_size=4096):
+    try:
+        file = open(path, "r+b")
+    except FileNotFoundError:
+        return
+    with file:
+        end = file.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - chunk_size)
+            file.seek(start)
+            newline = file.read(position - start).rfind(b"\n")
+            if newline >= 0:
+                position = start + newline + 1
+                break
+            position = start
+        if position < end:
+            file.truncate(position)
+            file.flush()
+            os.fsync(file.fileno())
+
+
+class Journal:
+    # durable append-only JSON-lines log of outgoing records; a small offset file marks how far
+    # the server has acknowledged, and the log is truncated once everything is acknowledged
+    def __init__(self, path, fsync_every=8, fsync_interval=1.0):
+        self.path = path
+        self.offset_path = path + ".offset"
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _drop_torn_tail(path)
+        self._file = open(path, "a", encoding="utf-8")
+
+    # Append a record and return it; each gets a fresh idempotency key for safe replay.
+    # fsync is batched: every `fsync_every` records or `fsync_interval` seconds, whichever comes first
+    def append(self, kind, payload):
+        record = {"key": uuid.uuid4().hex, "kind": kind, "payload": payload}
+        with self._lock:
+            self._file.write(json.dumps(record) + "\n")
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+                self._sync_locked()
+        return record
+
+    # Force buffered records to disk
+    def sync(self):
+        with self._lock:
+            if self._unsynced:
+                self._sync_locked()
+
+    def _sync_locked(self):
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def _acknowledged_offset(self):
+        try:
+            with open(self.offset_path, "r") as file:
+                return int(file.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    # Records not yet acknowledged, as (end_offset, record) pairs in append order
+    def pending(self, limit=None):
+        entries = []
+        with self._lock, open(self.path, "rb") as file:
+            file.seek(self._acknowledged_offset())
+            for line in file:
+                if not line.endswith(b"\n"):
+                    break  # partially written tail from a crash
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    record = None  # corrupt line; skipped but still acknowledged in order
+                entries.append((file.tell(), record))
+                if limit and len(entries) >= limit:
+                    break
+        return entries
+
+    # Mark everything up to `offset` as delivered; truncate the log when it is fully drained.
+    # Offset 0 is made durable before truncating: a crash in between only replays records the
+    # server already has (their idempotency keys make that harmless), whereas a stale offset
+    # past the end of the truncated log would skip or split new records.
+    def acknowledge(self, offset):
+        with self._lock:
+            if offset >= os.path.getsize(self.path):
+                self._write_offset(0)
+                self._file.truncate(0)
+                self._file.seek(0)
+                os.fsync(self._file.fileno())
+            else:
+                self._write_offset(offset)
+
+    def _write_offset(self, offset):
+        tmp_path = self.offset_path + ".tmp"
+        with open(tmp_path, "w") as file:
+            file.write(str(offset))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(tmp_path, self.offset_path)
+
+    def close(self):
+        self.sync()
+        self._file.close()
+
+
+class OfflineError(Exception):
+    # the backend could not be reached; records stay in the journal for a later replay
+    pass
+
+
+class Replayer:
+    # drains the journal to the backend in batches; runs on demand and from a background timer
+    def __init__(self, journal, send_batch, batch_size=100, retry_interval=15.0):
+        self.journal = journal
+        self.send_batch = send_batch
+        self.batch_size = batch_size
+        self.retry_interval = retry_interval
+        self._drain_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    # Deliver everything pending; raises OfflineError if the backend is unreachable
+    def flush(self):
+        with self._drain_lock:
+            self.journal.sync()
+            while True:
+                entries = self.journal.pending(self.batch_size)
+                if not entries:
+                    return
+                # send_batch returns how many leading records were delivered (or are permanently bad)
+                delivered = self.send_batch([record for _, record in entries])
+                if delivered:
+                    self.journal.acknowledge(entries[delivered - 1][0])
+                if delivered < len(entries):
+                    raise OfflineError(f"{len(entries) - delivered} record(s) waiting for the backend")
+
+    # Start the background thread that retries while records are pending
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="journal-replayer", daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.retry_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception:
+                pass
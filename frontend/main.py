@@ -6,7 +6,9 @@ from frontend.tracking_test import run_target_tracking
 from frontend.balance_test import run_balance_game
 from frontend.typing_test import run_typing_test
 from frontend.quiz import run_quiz
-from frontend.api_client import get_quiz_csv, register_user
+from frontend.api_client import get_quiz_csv, register_user, shutdown as shutdown_api_client
+from frontend.journal import OfflineError
+from frontend.upload_worker import worker as upload_worker
 from app.config import Config
 import os
 import csv
@@ -138,6 +140,25 @@ def main():
                   bg=Config.PRIMARY_COLOR, fg="white",
                   font=("Helvetica", 11, "bold"), relief="flat").pack(pady=20)
 
+        # Upload status, updated as background uploads finish
+        upload_status_label = tk.Label(main_window, text="", font=("Helvetica", 11),
+                                       fg="gray", bg=Config.BG_COLOR)
+        upload_status_label.pack(side="bottom", pady=5)
+
+        def show_upload_status(description, ok, error, pending):
+            if ok:
+                text, color = f"{description} saved.", "#198754"
+            elif isinstance(error, OfflineError):
+                text, color = f"{description} saved offline; it will upload when the backend is reachable.", "gray"
+            else:
+                text, color = f"{description} failed to upload: {error}", Config.ACCENT_COLOR
+            if pending:
+                text += f" ({pending} upload{'s' if pending > 1 else ''} pending)"
+            upload_status_label.config(text=text, fg=color)
+
+        upload_worker.add_listener(show_upload_status)
+        upload_worker.attach(main_window)
+
     # Bind Enter key to start session
     main_window.bind("<Return>", lambda event: start_session())
     tk.Button(main_window, text="Start", command=start_session,
@@ -146,6 +167,10 @@ def main():
 
     main_window.mainloop()
 
+    # Give uploads still in flight a chance to finish before exiting
+    upload_worker.wait(timeout=10)
+    shutdown_api_client()
+
 
 if __name__ == "__main__":
     main()
@@ -1,24 +1,21 @@
 import csv
+import io
 import os
 import tkinter as tk
-import json
 from tkinter.scrolledtext import ScrolledText
 from frontend.api_client import upload_quiz
+from frontend.assets import QUIZ_CHOICES, quiz_questions
+from frontend.upload_worker import worker as upload_worker
 from app.models import QuizQuestion, Quiz
 
 # Create data directory if it doesn't exist
 DATA_DIRECTORY = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data")
 os.makedirs(DATA_DIRECTORY, exist_ok=True)
 
-# Path to quiz questions JSON file
-QUESTION_FILE_PATH = os.path.join(os.getcwd(), 'assets', 'quiz_question_data.json')
-
 # Run the quiz GUI
 def run_quiz(parent_window, user_id):
-    # Load questions
-    with open(QUESTION_FILE_PATH, 'r') as file:
-        question_data = json.load(file)
-        quiz_object = Quiz([QuizQuestion(q['prompt'], q['choices'], q['answer']) for q in question_data])
+    # Load questions (cached; re-read only when the JSON file changes)
+    quiz_object = Quiz([QuizQuestion(prompt, list(choices), answer) for prompt, choices, answer in quiz_questions()])
 
     # Create quiz window
     quiz_window = tk.Toplevel(parent_window)
@@ -32,7 +29,7 @@ def run_quiz(parent_window, user_id):
     selected_choice = tk.IntVar()
 
     # Answer radio buttons
-    answer_buttons = [tk.Radiobutton(quiz_window, variable=selected_choice, value=i, font=("Helvetica", 18)) for i in range(3)]
+    answer_buttons = [tk.Radiobutton(quiz_window, variable=selected_choice, value=i, font=("Helvetica", 18)) for i in range(QUIZ_CHOICES)]
     for button in answer_buttons:
         button.pack(anchor="w")
 
@@ -61,19 +58,19 @@ def run_quiz(parent_window, user_id):
             
         results_path = os.path.join(DATA_DIRECTORY, "quiz_results.csv")
 
-        # Save results to CSV
-        with open(results_path, "w", newline="") as csv_file:
-            writer = csv.writer(csv_file)
-            # Write header then data
-            writer.writerow(["Question", "Your Answer", "Correct Answer", "Correct?"])
-            writer.writerows(answer_records)
+        # Build the CSV in memory: header then data
+        csv_buffer = io.StringIO()
+        writer = csv.writer(csv_buffer)
+        writer.writerow(["Question", "Your Answer", "Correct Answer", "Correct?"])
+        writer.writerows(answer_records)
 
-        # Read CSV content into string for upload
-        with open(results_path, "r") as csv_file:
-            csv_content = csv_file.read()
+        # Keep a local copy for the analysis screen
+        with open(results_path, "w", newline="") as csv_file:
+            csv_file.write(csv_buffer.getvalue())
 
-        # Upload results to backend
-        upload_quiz(user_id, total_score, quiz_object.num_questions, csv_content)
+        # Upload the answer rows to the backend in the background
+        upload_worker.submit("Quiz result", upload_quiz, user_id, total_score,
+                             quiz_object.num_questions, answers=answer_records)
 
         # Display final score and results path
         tk.Label(quiz_window, text=f"Score: {total_score}/{quiz_object.num_questions}",
@@ -0,0 +1,156 @@
+"""
+recording.py
+------------
+Compact input recordings of the motor tests and deterministic headless replay.
+
+A recording is a fixed header (test kind, impairment level, RNG seed, final score)
+followed by packed 21-byte event records, zlib-compressed on disk. The tests draw all
+their randomness from generators seeded with the recorded seed, so the seed stands in
+for every RNG draw. Each event also carries the simulation tick it arrived on, so replay
+feeds the events to the same session objects (frontend/simulation.py) the Tk tests drive,
+in the same model state the player saw, and rescores the session at full speed:
+
+    $ python -m frontend.recording data/recordings/*.mtr
+"""
+
+import argparse
+import math
+import os
+import random
+import struct
+import sys
+import time
+import zlib
+from datetime import datetime
+
+from app.config import Config
+from frontend.simulation import BalanceSession, TrackingSession, TypingSession
+
+RECORDINGS_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "recordings")
+
+MAGIC = b"MTRC"
+VERSION = 1
+# magic, version, test kind, impairment level, seed, final score
+HEADER = struct.Struct("<4sBB16sQd")
+# perf_counter offset (s), simulation tick, event kind, a, b
+RECORD = struct.Struct("<dIBii")
+
+KINDS = ("tracking", "balance", "typing")
+
+# event kinds
+START, MOTION, KEY, END = 0, 1, 2, 3
+# keysyms worth telling apart; anything else is recorded as 0 with its character
+KEYSYMS = ("", "Left", "Right", "Home", "End", "BackSpace", "Delete", "Return")
+
+
+def new_seed():
+    return random.getrandbits(63)
+
+
+class InputRecorder:
+    # appends packed event records to one bytearray, so recording costs no per-event objects
+    def __init__(self, kind, level, seed):
+        self.kind, self.level, self.seed = kind, level, seed
+        self.score = math.nan
+        self.buffer = bytearray()
+        self.origin = time.perf_counter()
+
+    def _record(self, kind, tick, a=0, b=0):
+        self.buffer += RECORD.pack(time.perf_counter() - self.origin, tick, kind, a, b)
+
+    def start(self, tick=0):
+        self._record(START, tick)
+
+    def motion(self, tick, x, y):
+        self._record(MOTION, tick, x, y)
+
+    def key(self, tick, keysym, char):
+        code = KEYSYMS.index(keysym) if keysym in KEYSYMS else 0
+        self._record(KEY, tick, code, ord(char) if len(char) == 1 else 0)
+
+    def end(self, tick, score):
+        self._record(END, tick)
+        self.score = score
+
+    # Write the recording under RECORDINGS_DIR when RECORD_SESSIONS is on; returns the path or None
+    def save(self, directory=RECORDINGS_DIR):
+        if not Config.RECORD_SESSIONS:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{self.kind}-{datetime.now():%Y%m%d-%H%M%S-%f}.mtr")
+        header = HEADER.pack(MAGIC, VERSION, KINDS.index(self.kind), self.level.encode()[:16], self.seed, self.score)
+        with open(path, "wb") as file:
+            file.write(zlib.compress(header + bytes(self.buffer)))
+        return path
+
+
+class Recording:
+    # a loaded recording: header fields plus the events as (t, tick, kind, a, b) tuples
+    def __init__(self, kind, level, seed, score, events):
+        self.kind, self.level, self.seed, self.score, self.events = kind, level, seed, score, events
+
+
+def load_recording(path):
+    with open(path, "rb") as file:
+        data = zlib.decompress(file.read())
+    magic, version, kind, level, seed, score = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} recording")
+    events = list(RECORD.iter_unpack(memoryview(data)[HEADER.size:]))
+    return Recording(KINDS[kind], level.rstrip(b"\0").decode(), seed, score, events)
+
+
+# Headless replays: the recorded events fed to the same sessions as the Tk tests
+
+def replay_tracking(recording):
+    session = TrackingSession(recording.level, seed=recording.seed)
+    for _, tick, kind, a, b in recording.events:
+        while session.ticks < tick:
+            session.step()
+        if kind == MOTION:
+            session.motion(a, b)
+    return session.score()
+
+
+def replay_balance(recording):
+    session = BalanceSession(recording.level)
+    for _, tick, kind, a, _ in recording.events:
+        while session.ticks < tick and not session.failed:
+            session.step()
+        if kind == KEY:
+            session.key(KEYSYMS[a])
+    return session.score()
+
+
+def replay_typing(recording):
+    session = TypingSession(recording.level, seed=recording.seed)
+    for _, _, kind, a, b in recording.events:
+        if kind == KEY:
+            session.key(KEYSYMS[a], chr(b) if b else "")
+    return session.score()
+
+
+REPLAYERS = {"tracking": replay_tracking, "balance": replay_balance, "typing": replay_typing}
+
+
+def replay(recording):
+    return REPLAYERS[recording.kind](recording)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay recorded test sessions and compare their scores.")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--tolerance", type=float, default=1e-6)
+    args = parser.parse_args()
+
+    mismatches = 0
+    start = time.perf_counter()
+    for path in args.paths:
+        recording = load_recording(path)
+        score = replay(recording)
+        ok = math.isclose(score, recording.score, abs_tol=args.tolerance)
+        mismatches += not ok
+        print(f"{'ok  ' if ok else 'DIFF'} {os.path.basename(path)}: {recording.kind}/{recording.level} "
+              f"{len(recording.events)} events, recorded {recording.score:.4f}, replayed {score:.4f}")
+    print(f"{len(args.paths)} recordings replayed in {time.perf_counter() - start:.2f}s, {mismatches} mismatched")
+    sys.exit(1 if mismatches else 0)
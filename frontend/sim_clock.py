@@ -0,0 +1,64 @@
+import time
+
+
+class SimulationClock:
+    # drives a test's physics at a fixed timestep measured with time.perf_counter, so a loaded
+    # Tk loop changes how often frames are drawn but not how fast the simulation runs.
+    # step() advances the simulation by one timestep; render(alpha) draws the state alpha
+    # (0..1) of the way from the previous step to the next one. Runs as a per-frame
+    # callback of the window's FrameScheduler.
+    def __init__(self, scheduler, step, render, timestep, max_steps=8, max_backlog=0.25):
+        self.scheduler = scheduler
+        self.step = step
+        self.render = render
+        self.timestep = timestep
+        self.max_steps = max_steps
+        self.max_backlog = max_backlog
+        self.ticks = 0
+        self.accumulator = 0.0
+        self.running = False
+        self.origin = None
+        self.dropped = 0.0
+        self._last = None
+
+    # Simulated seconds since start(), including the step in progress
+    @property
+    def elapsed(self):
+        return self.ticks * self.timestep
+
+    # perf_counter time the step in progress stands for, even when it runs late to catch up
+    @property
+    def step_time(self):
+        return self.origin + self.dropped + self.elapsed
+
+    def start(self):
+        self.running = True
+        self._last = self.origin = time.perf_counter()
+        self.scheduler.add(self._frame)
+        self.scheduler.start()
+
+    def stop(self):
+        self.running = False
+        self.scheduler.remove(self._frame)
+
+    def _frame(self, now):
+        if not self.running:
+            return
+        self.accumulator += now - self._last
+        self._last = now
+
+        # catch up on late frames, but never spiral: a stall longer than max_backlog is dropped
+        dropped = max(0.0, self.accumulator - self.max_backlog)
+        self.accumulator -= dropped
+        self.dropped += dropped
+        steps = 0
+        while self.accumulator >= self.timestep and steps < self.max_steps:
+            self.ticks += 1
+            self.step()
+            self.accumulator -= self.timestep
+            steps += 1
+            if not self.running:
+                return
+
+        self.render(min(self.accumulator / self.timestep, 1.0))
+        self.scheduler.timing.record_steps(steps, dropped * 1000)
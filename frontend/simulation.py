@@ -0,0 +1,313 @@
+"""
+simulation.py
+-------------
+Headless models of the three motor tests, shared by the Tk windows and by batch runs.
+Every model steps n sessions at once as NumPy arrays, so the Tk tests use n=1 while
+calibration and benchmarks (benchmarks/bench_simulation.py) step thousands of seeded
+sessions without a display. The *Session classes hold one test's input handling and
+scoring; the Tk windows and replay (frontend/recording.py) both drive them, so a replayed
+session is scored by the same code that scored it live.
+"""
+
+import difflib
+import math
+import random
+
+import numpy as np
+
+from app.config import Config
+from frontend.assets import compile_neighbors, qwerty_neighbors
+from frontend.stream_stats import StreamingStats
+
+# impairment levels and effects
+TRACKING_LEVELS = {
+    "normal": {"speed": 3, "wobble": 0},
+    "mild": {"speed": 3, "wobble": 2},
+    "moderate": {"speed": 2.5, "wobble": 5},
+    "severe": {"speed": 2, "wobble": 9},
+}
+BALANCE_LEVELS = {
+    "normal": {"gravity": 0.2, "tap_power": 5},
+    "mild": {"gravity": 0.4, "tap_power": 4},
+    "moderate": {"gravity": 0.6, "tap_power": 3},
+    "severe": {"gravity": 0.8, "tap_power": 2},
+}
+TYPO_RATES = {"normal": 0.0, "mild": 0.10, "moderate": 0.20, "severe": 0.40}
+
+TARGET_RADIUS = 40
+BALANCE_FAIL_LIMIT = 70
+# arrow keys of the balance game and the direction they tap the bar
+BALANCE_KEYS = {"Left": -1, "Right": 1}
+
+# Word pool for the typing test
+WORD_POOL = [
+    "coord", "reflex", "motor", "balance", "focus", "attention",
+    "hand", "foot", "eye", "leg", "arm", "brain", "speed", "control",
+    "vision", "memory", "timing", "reaction", "alert", "motion",
+    "judgment", "steady", "signal", "move", "respond", "target"
+]
+
+
+# Score helpers, shared with the Tk tests so headless runs are scored the same way
+def tracking_accuracy(average_distance):
+    return np.maximum(0, 100 - np.minimum(average_distance / 5, 100))
+
+
+# Share of a perfect run: time-integrated margin from the fail angle (degree-seconds) over the
+# margin of a bar held upright for the whole game, as a percentage
+def balance_accuracy(margin_integral, duration=Config.BALANCE_TEST_DURATION, fail_limit=BALANCE_FAIL_LIMIT):
+    return 100 * margin_integral / (fail_limit * duration)
+
+
+def typing_accuracy(target_text, typed_text):
+    return difflib.SequenceMatcher(None, target_text.strip(), typed_text.strip()).ratio() * 100
+
+
+# Six random words from the pool, drawn from a random.Random so a seed reproduces them
+def typing_target(rng):
+    return " ".join(rng.choices(WORD_POOL, k=6))
+
+
+class TrackingModel:
+    # bouncing target with per-step wobble; one step() is one TRACKING_TIMESTEP
+    def __init__(self, level="normal", n=1, seed=None, width=Config.CANVAS_WIDTH,
+                 height=Config.CANVAS_HEIGHT, radius=TARGET_RADIUS):
+        params = TRACKING_LEVELS.get(level, TRACKING_LEVELS["normal"])
+        self.speed, self.wobble = params["speed"], params["wobble"]
+        self.n, self.width, self.height, self.radius = n, width, height, radius
+        self.rng = np.random.default_rng(seed)
+        self.x = np.full(n, float(width // 2))
+        self.y = np.full(n, float(height // 2))
+        self.prev_x, self.prev_y = self.x.copy(), self.y.copy()
+        self.vx = self.rng.choice([-1, 1], n) * self.speed
+        self.vy = self.rng.choice([-1, 1], n) * self.speed
+        self.wobble_x = np.zeros(n, dtype=int)
+        self.wobble_y = np.zeros(n, dtype=int)
+        self.drawn_radius = np.full(n, radius)
+        self.ticks = 0
+
+    def step(self):
+        self.ticks += 1
+        self.prev_x[:], self.prev_y[:] = self.x, self.y
+        self.x += self.vx
+        self.y += self.vy
+
+        # bounce off the edges
+        r = self.radius
+        self.vx[(self.x - r <= 0) | (self.x + r >= self.width)] *= -1
+        self.vy[(self.y - r <= 0) | (self.y + r >= self.height)] *= -1
+
+        # wobble of the drawn target, based on impairment level
+        w = self.wobble
+        self.wobble_x = self.rng.integers(-w, w + 1, self.n)
+        self.wobble_y = self.rng.integers(-w, w + 1, self.n)
+        self.drawn_radius = r + self.rng.integers(-w // 2, w // 2 + 1, self.n)
+
+
+class BalanceModel:
+    # bar that falls away from upright and is pushed back by taps; one step() is one BALANCE_TIMESTEP.
+    # Scoring integrates the margin from the fail angle over time, so it does not depend on the step rate.
+    def __init__(self, level="normal", n=1, fail_limit=BALANCE_FAIL_LIMIT, timestep=Config.BALANCE_TIMESTEP):
+        params = BALANCE_LEVELS.get(level, BALANCE_LEVELS["normal"])
+        self.gravity, self.tap_power = params["gravity"], params["tap_power"]
+        self.fail_limit = fail_limit
+        self.timestep = timestep
+        self.angle = np.zeros(n)
+        self.prev_angle = np.zeros(n)
+        self.margin_integral = np.zeros(n)
+        self.failed = np.zeros(n, dtype=bool)
+        self.ticks = 0
+
+    # Advance every session still standing; returns the sessions that fell on this step
+    def step(self):
+        self.ticks += 1
+        active = ~self.failed
+        self.prev_angle[:] = self.angle
+        self.angle[active] += self.gravity * np.where(self.angle[active] > 0, 1, -1)
+        np.clip(self.angle, -90, 90, out=self.angle)
+        fell = active & (np.abs(self.angle) >= self.fail_limit)
+        self.failed |= fell
+        standing = active & ~fell
+
+        # trapezoid rule over the step
+        margin = np.maximum(0, self.fail_limit - np.abs(self.angle[standing]))
+        prev_margin = np.maximum(0, self.fail_limit - np.abs(self.prev_angle[standing]))
+        self.margin_integral[standing] += (margin + prev_margin) / 2 * self.timestep
+        return fell
+
+    # Tap left (-1) or right (+1); direction may be a scalar or one value per session (0 = no tap).
+    # Taps move the bar at once, so both ends of the interpolation shift. Returns the sessions that fell.
+    def tap(self, direction):
+        active = ~self.failed
+        push = np.where(active, np.asarray(direction) * self.tap_power, 0)
+        self.angle = np.clip(self.angle + push, -90, 90)
+        self.prev_angle = np.clip(self.prev_angle + push, -90, 90)
+        fell = active & (np.abs(self.angle) >= self.fail_limit)
+        self.failed |= fell
+        return fell
+
+    @property
+    def accuracy(self):
+        return balance_accuracy(self.margin_integral, fail_limit=self.fail_limit)
+
+
+class TypoModel:
+    # substitutes typed letters with a random QWERTY neighbour at the impairment level's rate
+    def __init__(self, level="normal", seed=None, neighbors=None):
+        self.rate = TYPO_RATES.get(level, 0.0)
+        self.rng = np.random.default_rng(seed)
+        # neighbour table indexed by code point: counts[c] neighbours in table[c, :counts[c]],
+        # compiled once per asset version and shared (read-only) by every model
+        compiled = qwerty_neighbors() if neighbors is None else compile_neighbors(neighbors)
+        self.table = compiled.table
+        self.counts = compiled.counts
+
+    # Typo for one keystroke in the Tk test: the replacement character, or None
+    def maybe_typo(self, char):
+        if len(char) != 1 or not char.isalpha() or ord(char.lower()) > 255:
+            return None
+        code = ord(char.lower())
+        replaced = int(self.inject(np.array([[code]], dtype=np.uint8))[0, 0])
+        return chr(replaced) if replaced != code else None
+
+    # Apply typos to an (n, length) uint8 array of lowercase ASCII keystrokes, returning a new array
+    def inject(self, codes):
+        codes = np.asarray(codes, dtype=np.uint8)
+        counts = self.counts[codes]
+        hit = (counts > 0) & (self.rng.random(codes.shape) < self.rate)
+        picks = (self.rng.random(codes.shape) * np.maximum(counts, 1)).astype(np.intp)
+        return np.where(hit, self.table[codes, picks], codes).astype(np.uint8)
+
+
+# Sessions: one test driven event by event, by the Tk windows and by replay
+
+class TrackingSession:
+    # the target model plus the cursor distances from its center that score the test
+    def __init__(self, level="normal", seed=None, width=Config.CANVAS_WIDTH, height=Config.CANVAS_HEIGHT):
+        self.model = TrackingModel(level, seed=seed, width=width, height=height)
+        self.distance_stats = StreamingStats()
+
+    @property
+    def ticks(self):
+        return self.model.ticks
+
+    # True target center (the drawn target wobbles around it)
+    @property
+    def center(self):
+        return float(self.model.x[0]), float(self.model.y[0])
+
+    def step(self):
+        self.model.step()
+
+    # The cursor moved to (x, y)
+    def motion(self, x, y):
+        self.distance_stats.add(math.dist((x, y), self.center))
+
+    def score(self):
+        return float(tracking_accuracy(self.distance_stats.summary()["mean"]))
+
+
+class BalanceSession:
+    # the bar model, tapped by the arrow keys
+    def __init__(self, level="normal", timestep=Config.BALANCE_TIMESTEP):
+        self.model = BalanceModel(level, timestep=timestep)
+
+    @property
+    def ticks(self):
+        return self.model.ticks
+
+    @property
+    def failed(self):
+        return bool(self.model.failed[0])
+
+    # One timestep; True if the bar fell
+    def step(self):
+        return bool(self.model.step()[0])
+
+    # A key press; arrow keys tap the bar. True if the bar fell
+    def key(self, keysym):
+        if keysym not in BALANCE_KEYS or self.failed:
+            return False
+        return bool(self.model.tap(BALANCE_KEYS[keysym])[0])
+
+    def score(self):
+        return float(self.model.accuracy[0])
+
+
+class TypingSession:
+    # the target words, the typed text and cursor, and QWERTY typos for the level. key() applies
+    # the plain editing keys itself and the Tk entry only displays the result, so there is no
+    # second copy of the editing rules to drift out of step with replay
+    def __init__(self, level="normal", seed=None):
+        self.target_text = typing_target(random.Random(seed))
+        self.typo_model = TypoModel(level, seed=seed)
+        self.chars = []
+        self.cursor = 0
+
+    @property
+    def text(self):
+        return "".join(self.chars)
+
+    # A key press: cursor movement, deletion or a printable character, which may come out as a
+    # neighbouring key's letter. Other keys (modifiers, Return, ...) leave the text alone
+    def key(self, keysym, char):
+        replacement = self.typo_model.maybe_typo(char)
+        if keysym == "Left":
+            self.cursor = max(0, self.cursor - 1)
+        elif keysym == "Right":
+            self.cursor = min(len(self.chars), self.cursor + 1)
+        elif keysym == "Home":
+            self.cursor = 0
+        elif keysym == "End":
+            self.cursor = len(self.chars)
+        elif keysym == "BackSpace":
+            if self.cursor:
+                del self.chars[self.cursor - 1]
+                self.cursor -= 1
+        elif keysym == "Delete":
+            del self.chars[self.cursor:self.cursor + 1]
+        elif len(char) == 1 and char.isprintable():
+            self.chars.insert(self.cursor, replacement or char)
+            self.cursor += 1
+
+    def score(self):
+        return typing_accuracy(self.target_text, self.text)
+
+
+# Batch runs: scripted players so level calibration does not need a human at the mouse
+
+def simulate_tracking(level, sessions, seconds=Config.TRACKING_TEST_DURATION, seed=None,
+                      cursor_gain=0.25, cursor_noise=2.0):
+    # cursor chasing the drawn (wobbling) target with first-order lag and jitter, scored by its
+    # distance from the true center as in the Tk test; returns per-session accuracy
+    model = TrackingModel(level, sessions, seed)
+    rng = np.random.default_rng(None if seed is None else seed + 1)
+    cursor_x, cursor_y = model.x.copy(), model.y.copy()
+    distance_sum = np.zeros(sessions)
+    steps = int(round(seconds / Config.TRACKING_TIMESTEP))
+    for _ in range(steps):
+        model.step()
+        cursor_x += cursor_gain * (model.x + model.wobble_x - cursor_x) + rng.normal(0, cursor_noise, sessions)
+        cursor_y += cursor_gain * (model.y + model.wobble_y - cursor_y) + rng.normal(0, cursor_noise, sessions)
+        distance_sum += np.hypot(cursor_x - model.x, cursor_y - model.y)
+    return tracking_accuracy(distance_sum / steps)
+
+
+def simulate_balance(level, sessions, seconds=Config.BALANCE_TEST_DURATION, seed=None,
+                     threshold=10, reaction=0.3):
+    # player who taps back toward upright with probability `reaction` per step once the bar leans
+    # past `threshold` degrees; returns (accuracy, failed) per session
+    model = BalanceModel(level, sessions)
+    rng = np.random.default_rng(seed)
+    for _ in range(int(round(seconds / Config.BALANCE_TIMESTEP))):
+        model.step()
+        react = (np.abs(model.angle) > threshold) & (rng.random(sessions) < reaction)
+        model.tap(np.where(react, -np.sign(model.angle), 0))
+    return model.accuracy, model.failed
+
+
+def simulate_typing(level, target_text, sessions, seed=None):
+    # perfect typist with injected typos; returns per-session typing accuracy
+    codes = np.frombuffer(target_text.lower().encode("ascii"), dtype=np.uint8)
+    typed = TypoModel(level, seed).inject(np.broadcast_to(codes, (sessions, codes.size)))
+    return np.array([typing_accuracy(target_text.lower(), row.tobytes().decode("ascii")) for row in typed])
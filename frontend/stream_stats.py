@@ -0,0 +1,139 @@
+import math
+from array import array
+
+
+class RingBuffer:
+    # fixed-capacity array('d') that keeps the most recent samples, overwriting the oldest
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.data = array('d', bytes(8 * capacity))
+        self.next = 0
+        self.count = 0
+
+    def append(self, value):
+        self.data[self.next] = value
+        self.next = (self.next + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def __len__(self):
+        return self.count
+
+    # The buffered samples, oldest first
+    def values(self):
+        if self.count < self.capacity:
+            return self.data[:self.count]
+        return self.data[self.next:] + self.data[:self.next]
+
+    # Exact summary of the buffered samples (zeros when empty)
+    def summary(self):
+        ordered = sorted(self.values())
+        if not ordered:
+            return {"count": 0, "mean": 0.0, "std": 0.0, "min": 0.0, "max": 0.0, "p50": 0.0, "p90": 0.0}
+        mean = sum(ordered) / len(ordered)
+        variance = sum((v - mean) ** 2 for v in ordered) / (len(ordered) - 1) if len(ordered) > 1 else 0.0
+        return {"count": len(ordered), "mean": mean, "std": math.sqrt(variance),
+                "min": ordered[0], "max": ordered[-1],
+                "p50": ordered[round((len(ordered) - 1) * 0.5)], "p90": ordered[round((len(ordered) - 1) * 0.9)]}
+
+
+class P2Quantile:
+    # P-square estimate of one quantile (Jain & Chlamtac, 1985): five markers, O(1) memory per sample
+    def __init__(self, p):
+        self.p = p
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        q, n = self.heights, self.positions
+        if len(q) < 5:
+            q.append(x)
+            if len(q) == 5:
+                q.sort()
+            return
+
+        # find the cell x falls in, stretching the extreme markers if needed
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # move the middle markers toward their desired positions
+        for i in (1, 2, 3):
+            d = self.desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                height = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < height < q[i + 1]:
+                    # parabolic step overshot a neighbour: fall back to linear
+                    height = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = height
+                n[i] += d
+
+    # Current estimate (exact while fewer than five samples have been seen)
+    def value(self):
+        if len(self.heights) == 5:
+            return self.heights[2]
+        if not self.heights:
+            return 0.0
+        ordered = sorted(self.heights)
+        return ordered[round((len(ordered) - 1) * self.p)]
+
+
+class StreamingStats:
+    # running count/mean/variance (Welford), min/max and quantile sketches;
+    # every add() is O(1) time and memory
+    def __init__(self, quantiles=(0.5, 0.9, 0.95)):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.quantiles = {p: P2Quantile(p) for p in quantiles}
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if x < self.minimum:
+            self.minimum = x
+        if x > self.maximum:
+            self.maximum = x
+        for estimator in self.quantiles.values():
+            estimator.add(x)
+
+    # Sample variance (0 with fewer than two samples)
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def quantile(self, p):
+        return self.quantiles[p].value()
+
+    # Summary of everything seen so far (zeros when empty)
+    def summary(self):
+        if not self.count:
+            return {"count": 0, "mean": 0.0, "std": 0.0, "min": 0.0, "max": 0.0,
+                    **{f"p{round(p * 100)}": 0.0 for p in self.quantiles}}
+        return {"count": self.count, "mean": self.mean, "std": self.std,
+                "min": self.minimum, "max": self.maximum,
+                **{f"p{round(p * 100)}": estimator.value() for p, estimator in self.quantiles.items()}}
@@ -1,12 +1,18 @@
 import tkinter as tk
-import random, time, math
+import time, math
+from array import array
 from tkinter import messagebox
 from frontend.api_client import upload_test
+from frontend.upload_worker import worker as upload_worker
 from app.config import Config
 from frontend.learn_popup import show_learn_popup
+from frontend.sim_clock import SimulationClock
+from frontend.frame_scheduler import FrameScheduler
+from frontend.simulation import TrackingSession
+from frontend.recording import InputRecorder, new_seed
 
 # runs the test and sets the default impairment level to normal
-def run_target_tracking(parent_window, user_id, impairment_level="normal"):
+def run_target_tracking(parent_window, user_id, impairment_level="normal", seed=None):
     # create window for the test
     tracking_window = tk.Toplevel(parent_window)
     tracking_window.title(f"Target Tracking Test ({impairment_level.capitalize()})")
@@ -17,83 +23,75 @@ def run_target_tracking(parent_window, user_id, impairment_level="normal"):
     canvas = tk.Canvas(tracking_window, width=canvas_width, height=canvas_height, bg="white")
     canvas.pack()
 
-    # impairment levels and effects
-    impairment_parameters = {
-        "normal": {"speed": 3, "wobble": 0},
-        "mild": {"speed": 3, "wobble": 2},
-        "moderate": {"speed": 2.5, "wobble": 5},
-        "severe": {"speed": 2, "wobble": 9},
-    }
-
-    # target variables
-    target_speed, target_wobble = impairment_parameters.get(impairment_level, impairment_parameters["normal"]).values()
-    target_radius = 40
-    target_center_x, target_center_y = canvas_width // 2, canvas_height // 2
+    # one frame loop for the window; target updates go through the dirty-tracking canvas
+    scheduler = FrameScheduler(tracking_window)
+    frame_canvas = scheduler.canvas(canvas)
+
+    # target motion, wobble and scoring for this impairment level come from the shared simulation
+    # session, seeded so the session can be replayed from its input recording
+    seed = new_seed() if seed is None else seed
+    recorder = InputRecorder("tracking", impairment_level, seed)
+    session = TrackingSession(impairment_level, seed=seed, width=canvas_width, height=canvas_height)
+    target = session.model
+    target_radius = target.radius
+    target_center_x, target_center_y = session.center
     target_shape_id = None
 
-    # determine a random velocity
-    target_velocity_x, target_velocity_y = random.choice([-1, 1]) * target_speed, random.choice([-1, 1]) * target_speed
-    
     # displays timer for user to see
     _, time_remaining = Config.TRACKING_TEST_DURATION, Config.TRACKING_TEST_DURATION
     timer_label = tk.Label(tracking_window, text=f"Time: {time_remaining}", font=("Helvetica", 12, "bold"),
                            fg=Config.PRIMARY_COLOR, bg=Config.BG_COLOR)
     timer_label.pack(pady=5)
 
-    # variables for tracking results
-    test_start_time, recorded_distances = None, []
+    # variables for tracking results; the session summarizes distances as they arrive, so
+    # memory stays constant however fast the mouse reports motion
+    test_start_time = None
     test_is_running = False
 
-    # counts the timer down
-    def update_timer():
-        nonlocal time_remaining, test_is_running
-        if not test_is_running:
-            return
-        if time_remaining > 0:
-            time_remaining -= 1
+    # raw samples, flat rows of Config.TRAJECTORY_COLUMNS: time, cursor x/y, target x/y
+    trajectory = array('f')
+    cursor_x, cursor_y = None, None
+
+    # appends one trajectory sample using the latest cursor and target positions
+    def record_sample():
+        if cursor_x is not None:
+            trajectory.extend((time.time() - test_start_time, cursor_x, cursor_y,
+                               target_center_x, target_center_y))
+
+    # moves the target by one fixed timestep and counts the timer down in simulated time
+    def move_target():
+        nonlocal target_center_x, target_center_y, time_remaining
+        session.step()
+        target_center_x, target_center_y = session.center
+        record_sample()
+
+        # the timer follows the simulation clock so every machine gets the same test length
+        seconds_left = max(0, math.ceil(Config.TRACKING_TEST_DURATION - clock.elapsed))
+        if seconds_left != time_remaining:
+            time_remaining = seconds_left
             timer_label.config(text=f"Time: {time_remaining}")
-            tracking_window.after(1000, update_timer)
-        else:
+        if clock.elapsed >= Config.TRACKING_TEST_DURATION:
             end_test(auto=True)
 
-    # moves the target 
-    def move_target():
-        nonlocal target_center_x, target_center_y, target_velocity_x, target_velocity_y, test_is_running
-        if not test_is_running:
-            return
+    # draws the target part way between its last two positions, then applies the wobble
+    def draw_target(alpha):
+        x = target.prev_x[0] + (target.x[0] - target.prev_x[0]) * alpha + target.wobble_x[0]
+        y = target.prev_y[0] + (target.y[0] - target.prev_y[0]) * alpha + target.wobble_y[0]
+        radius = target.drawn_radius[0]
+        frame_canvas.coords(target_shape_id, x - radius, y - radius, x + radius, y + radius)
 
-        # changes the targets position for later
-        target_center_x += target_velocity_x
-        target_center_y += target_velocity_y
-        
-        # allows the target to bounce off edges
-        if target_center_x - target_radius <= 0 or target_center_x + target_radius >= canvas_width:
-            target_velocity_x *= -1
-        if target_center_y - target_radius <= 0 or target_center_y + target_radius >= canvas_height:
-            target_velocity_y *= -1
-
-        # wobble is added based on impairment level
-        wobble_offset_x = random.randint(-target_wobble, target_wobble)
-        wobble_offset_y = random.randint(-target_wobble, target_wobble)
-        adjusted_radius = target_radius + random.randint(-target_wobble // 2, target_wobble // 2)
-
-        # takes the new updated coords and wobbles, then moves the target
-        canvas.coords(target_shape_id,
-                      target_center_x - adjusted_radius + wobble_offset_x,
-                      target_center_y - adjusted_radius + wobble_offset_y,
-                      target_center_x + adjusted_radius + wobble_offset_x,
-                      target_center_y + adjusted_radius + wobble_offset_y)
-        
-        # provides the next movement
-        tracking_window.after(30, move_target)
+    clock = SimulationClock(scheduler, move_target, draw_target, Config.TRACKING_TIMESTEP)
 
     # tracks the mouse in correlation to the target
     def record_mouse_position(event):
-        if test_start_time:
+        nonlocal cursor_x, cursor_y
+        if test_start_time and test_is_running:
 
-            # calculates distance from target center and records it
-            distance_from_target = math.dist((event.x, event.y), (target_center_x, target_center_y))
-            recorded_distances.append(distance_from_target)
+            # scores the distance from the target center and records the motion for replay
+            session.motion(event.x, event.y)
+            recorder.motion(clock.ticks, event.x, event.y)
+            cursor_x, cursor_y = event.x, event.y
+            record_sample()
 
     # allows the program to record the mouse motion
     canvas.bind("<Motion>", record_mouse_position)
@@ -105,7 +103,7 @@ def run_target_tracking(parent_window, user_id, impairment_level="normal"):
         # displays the countdown
         if seconds_remaining >= 0:
             canvas.create_text(canvas_width / 2, canvas_height / 2, text=str(seconds_remaining), font=("Helvetica", 40))
-            tracking_window.after(1000, lambda: start_countdown(seconds_remaining - 1))
+            scheduler.call_later(1, lambda: start_countdown(seconds_remaining - 1))
         else:
             start_test()
 
@@ -122,8 +120,8 @@ def run_target_tracking(parent_window, user_id, impairment_level="normal"):
         # sets the starting time and state
         test_start_time = time.time()
         test_is_running = True
-        update_timer()
-        move_target()
+        recorder.start()
+        clock.start()
 
     # ends the test
     def end_test(auto=False):
@@ -133,19 +131,28 @@ def run_target_tracking(parent_window, user_id, impairment_level="normal"):
         
         # records the end time and computes results
         test_is_running = False
+        clock.stop()
         total_time_elapsed = time.time() - test_start_time
 
         # computes average distance and accuracy score
-        average_distance = sum(recorded_distances) / len(recorded_distances) if recorded_distances else 0
-        accuracy_score = max(0, 100 - min(average_distance / 5, 100))
+        stats = session.distance_stats.summary()
+        average_distance = stats["mean"]
+        accuracy_score = session.score()
+        recorder.end(clock.ticks, accuracy_score)
+        recorder.save()
 
-        # uploads the results
-        upload_test(user_id, total_time_elapsed, accuracy_score, impairment_level)
+        # uploads the results with the raw trajectory and frame timing in the background
+        upload_worker.submit("Tracking test result", upload_test,
+                             user_id, total_time_elapsed, accuracy_score, impairment_level, trajectory,
+                             meta={"frame_timing": scheduler.summary()})
 
         message_text = "Time up!" if auto else "Test ended."
         messagebox.showinfo(
             "Tracking Results",
             f"{message_text}\nTotal time: {total_time_elapsed:.1f}s\nAverage distance: {average_distance:.1f}px"
+            f" (±{stats['std']:.1f})\nMedian distance: {stats['p50']:.1f}px"
+            f"\n90th / 95th percentile: {stats['p90']:.1f} / {stats['p95']:.1f}px"
+            f"\nFurthest: {stats['max']:.1f}px over {stats['count']} samples"
         )
 
         # shows learning popup before closing
@@ -169,4 +176,5 @@ def run_target_tracking(parent_window, user_id, impairment_level="normal"):
     messagebox.showinfo("How to Play", "Keep the cursor inside the circle")
     tracking_window.lift()
     tracking_window.focus_force()
+    scheduler.start()
     start_countdown()
@@ -0,0 +1,70 @@
+import queue
+import threading
+
+
+class UploadWorker:
+    # runs uploads on one background thread so the Tk main thread never waits on the network;
+    # outcomes are queued back and delivered on the Tk thread by after() polling
+    def __init__(self, poll_interval_ms=100):
+        self.poll_interval_ms = poll_interval_ms
+        self.jobs = queue.Queue()
+        self.outcomes = queue.Queue()
+        self.listeners = []
+        self.pending = 0
+        self._idle = threading.Condition()
+        self._root = None
+        self._thread = threading.Thread(target=self._run, name="upload-worker", daemon=True)
+        self._thread.start()
+
+    # Queue an upload; on_done(ok, error) runs later on the Tk thread
+    def submit(self, description, func, *args, on_done=None, **kwargs):
+        with self._idle:
+            self.pending += 1
+        self.jobs.put((description, func, args, kwargs, on_done))
+
+    # Register listener(description, ok, error, pending), called on the Tk thread after each upload
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    # Start delivering outcomes to the given Tk window
+    def attach(self, root):
+        self._root = root
+        root.after(self.poll_interval_ms, self._poll)
+
+    # Block until queued uploads finish (used on exit); returns False on timeout
+    def wait(self, timeout=None):
+        with self._idle:
+            return self._idle.wait_for(lambda: self.pending == 0, timeout)
+
+    def _run(self):
+        while True:
+            description, func, args, kwargs, on_done = self.jobs.get()
+            try:
+                func(*args, **kwargs)
+                outcome = (description, True, None, on_done)
+            except Exception as e:
+                outcome = (description, False, e, on_done)
+            with self._idle:
+                self.pending -= 1
+                self._idle.notify_all()
+            self.outcomes.put(outcome)
+
+    def _poll(self):
+        try:
+            while True:
+                description, ok, error, on_done = self.outcomes.get_nowait()
+                if on_done:
+                    on_done(ok, error)
+                for listener in self.listeners:
+                    listener(description, ok, error, self.pending)
+        except queue.Empty:
+            pass
+        try:
+            self._root.after(self.poll_interval_ms, self._poll)
+        except Exception:
+            # window destroyed; stop polling
+            self._root = None
+
+
+# shared worker used by every test window
+worker = UploadWorker()
@@ -1,3 +1,20 @@
-from app.routes import app
+import argparse
+from app import create_app
+from app.config import Config
+from app.server import serve
+
+app = create_app()
+
 if __name__ == "__main__":
-    app.run(debug=True)
+    parser = argparse.ArgumentParser(description="Run the Flask backend.")
+    parser.add_argument("--host", default=Config.SERVER_HOST, help="address to bind")
+    parser.add_argument("--port", type=int, default=Config.SERVER_PORT)
+    parser.add_argument("--threads", type=int, default=Config.SERVER_THREADS, help="worker threads")
+    parser.add_argument("--debug", action="store_true",
+                        help="use Flask's single-process reloader/debugger server instead")
+    args = parser.parse_args()
+
+    if args.debug:
+        app.run(host=args.host, port=args.port, debug=True)
+    else:
+        serve(app, args.host, args.port, args.threads)
@@ -0,0 +1,38 @@
+import pytest
+
+from app import create_app
+from app.config import Config
+
+
+# An app on a fresh SQLite file per test; extra Config attributes can be passed as keywords
+@pytest.fixture
+def make_app(tmp_path):
+    apps = []
+
+    def make(**overrides):
+        attrs = {"SQLALCHEMY_DATABASE_URI": "sqlite:///" + str(tmp_path / "test.db"),
+                 "ARCHIVE_DIR": str(tmp_path / "archive"), **overrides}
+        app = create_app(type("TestConfig", (Config,), attrs))
+        apps.append(app)
+        return app
+
+    yield make
+    for app in apps:
+        for hook in app.extensions.get("shutdown_hooks", []):
+            hook()
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+# Register a user and return its id
+@pytest.fixture
+def user_id(client):
+    return client.post("/register", json={"username": "tester"}).get_json()["user_id"]
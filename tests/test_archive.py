@@ -0,0 +1,33 @@
+import base64
+import json
+import zlib
+
+import numpy as np
+
+from app.archive import archive_old_results
+
+
+def test_archived_trajectory_can_still_be_read(app, client, user_id):
+    samples = np.arange(20, dtype="<f4").reshape(4, 5)
+    blob = zlib.compress(samples.tobytes())
+    r = client.post("/upload_test", json={"user_id": user_id, "avg_time": 1.0, "accuracy": 90.0, "mode": "normal",
+                                          "timestamp": "2020-01-15T12:00:00",
+                                          "trajectory": base64.b64encode(blob).decode()})
+    assert r.status_code == 200
+    result_id = client.get(f"/users/{user_id}/history").get_json()["items"][0]["id"]
+    hot = client.get("/export", query_string={"table": "trajectory", "format": "ndjson"}).data
+
+    with app.app_context():
+        assert archive_old_results(days=30)["test_result"] == 1
+    assert client.get(f"/users/{user_id}/history").get_json()["items"] == []
+
+    r = client.get(f"/results/{result_id}/trajectory")
+    assert r.status_code == 200
+    assert r.data == blob
+    assert r.headers["X-Trajectory-Samples"] == "4"
+    assert client.get(f"/results/{result_id + 1}/trajectory").status_code == 404
+
+    r = client.get("/export", query_string={"table": "trajectory", "format": "ndjson", "user_id": user_id})
+    rows = [json.loads(line) for line in r.data.decode().splitlines()]
+    assert [(row["test_result_id"], base64.b64decode(row["data"])) for row in rows] == [(result_id, blob)]
+    assert r.data == hot
@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+from frontend.journal import Journal
+
+
+def test_drained_journal_is_truncated(tmp_path):
+    journal = Journal(str(tmp_path / "journal.jsonl"))
+    for i in range(3):
+        journal.append("test", {"i": i})
+    entries = journal.pending()
+    journal.acknowledge(entries[0][0])
+    assert [record["payload"]["i"] for _, record in journal.pending()] == [1, 2]
+
+    journal.acknowledge(entries[-1][0])
+    assert os.path.getsize(journal.path) == 0
+    journal.append("test", {"i": 3})
+    assert [record["payload"]["i"] for _, record in journal.pending()] == [3]
+    journal.close()
+
+
+@pytest.mark.parametrize("crash_on", ["replace", "truncate"])
+def test_crash_while_draining_never_skips_records(tmp_path, monkeypatch, crash_on):
+    journal = Journal(str(tmp_path / "journal.jsonl"))
+    for i in range(3):
+        journal.append("test", {"i": i})
+    entries = journal.pending()
+    journal.acknowledge(entries[0][0])
+
+    class Crash(Exception):
+        pass
+
+    def crash(*args):
+        raise Crash()
+
+    # crash while persisting the offset, or after persisting it but before truncating
+    if crash_on == "replace":
+        monkeypatch.setattr(os, "replace", crash)
+    else:
+        journal._file.truncate = crash
+    with pytest.raises(Crash):
+        journal.acknowledge(entries[-1][0])
+    monkeypatch.undo()
+    journal._file.close()
+
+    # restart: every unacknowledged record (and possibly some already delivered) is replayed
+    restarted = Journal(journal.path)
+    restarted.append("test", {"i": 3})
+    replayed = [record["payload"]["i"] if record else None for _, record in restarted.pending()]
+    assert None not in replayed and replayed[-3:] == [1, 2, 3]
+    restarted.close()
+
+
+def test_append_after_torn_write_is_not_lost(tmp_path):
+    journal = Journal(str(tmp_path / "journal.jsonl"))
+    journal.append("test", {"i": 0})
+    # the process dies half way through writing the next record
+    journal._file.write('{"key": "torn", "kind": "test", "payl')
+    journal._file.close()
+
+    restarted = Journal(journal.path)
+    restarted.append("test", {"i": 2})
+    assert [record["payload"]["i"] for _, record in restarted.pending()] == [0, 2]
+    restarted.close()
@@ -0,0 +1,41 @@
+import base64
+import json
+
+import pytest
+
+
+def cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+def upload(client, user_id, accuracy):
+    client.post("/upload_test", json={"user_id": user_id, "avg_time": 1.0, "accuracy": accuracy, "mode": "normal"})
+
+
+def test_pages_follow_next_cursor(client, user_id):
+    for accuracy in range(5):
+        upload(client, user_id, accuracy)
+    seen, next_cursor = [], None
+    while True:
+        params = {"mode": "normal", "limit": 2, **({"cursor": next_cursor} if next_cursor else {})}
+        page = client.get("/leaderboard", query_string=params).get_json()
+        seen += [item["accuracy"] for item in page["items"]]
+        next_cursor = page["next_cursor"]
+        if not next_cursor:
+            break
+    assert seen == [4, 3, 2, 1, 0]
+
+    page = client.get(f"/users/{user_id}/history", query_string={"limit": 2}).get_json()
+    rest = client.get(f"/users/{user_id}/history", query_string={"cursor": page["next_cursor"]}).get_json()
+    assert len(page["items"]) + len(rest["items"]) == 5
+
+
+@pytest.mark.parametrize("value", [[1], "x", "ab", 7, None, {"a": 1}, [None, "a"], [1.5, 2.5],
+                                   ["2025-01-01T00:00:00", True], ["not a date", 1], [[], 1]])
+def test_malformed_cursor_is_rejected(client, user_id, value):
+    upload(client, user_id, 50)
+    for path, params in [(f"/users/{user_id}/history", {}), ("/leaderboard", {"mode": "normal"})]:
+        r = client.get(path, query_string={**params, "cursor": cursor(value)})
+        assert r.status_code == 400, (path, value)
+    r = client.get("/leaderboard", query_string={"mode": "normal", "cursor": "%%%"})
+    assert r.status_code == 400
@@ -0,0 +1,238 @@
+import math
+import types
+
+import pytest
+
+import frontend.balance_test as balance_test
+import frontend.frame_scheduler as frame_scheduler
+import frontend.sim_clock as sim_clock
+import frontend.tracking_test as tracking_test
+import frontend.typing_test as typing_test
+from app.config import Config
+from frontend.recording import InputRecorder, load_recording, replay
+from frontend.simulation import TypingSession
+
+
+# Just enough of tkinter to run the tests' own run_* functions without a display: widgets keep
+# their bindings, after() callbacks wait for the test to run them on a fake clock
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def perf_counter(self):
+        return self.now
+
+
+class Event:
+    def __init__(self, widget=None, x=0, y=0, keysym="", char=""):
+        self.widget, self.x, self.y, self.keysym, self.char = widget, x, y, keysym, char
+
+
+class Widget:
+    def __init__(self, master=None, **options):
+        widgets.append(self)
+        self.master = master
+        self.options = options
+        self.bindings = {}
+        self.destroyed = False
+
+    def pack(self, **options):
+        pass
+
+    def config(self, **options):
+        self.options.update(options)
+
+    configure = config
+
+    def bind(self, sequence, handler, add=None):
+        self.bindings.setdefault(sequence, [])
+        if not add:
+            self.bindings[sequence].clear()
+        self.bindings[sequence].append(handler)
+
+    # Run the handlers bound to a sequence; returns whether one of them answered "break"
+    def fire(self, sequence, event):
+        return any(handler(event) == "break" for handler in list(self.bindings.get(sequence, [])))
+
+    def focus_set(self):
+        pass
+
+
+class Toplevel(Widget):
+    def __init__(self, master=None, **options):
+        super().__init__(master, **options)
+        self.timers = {}
+        self.next_id = 0
+
+    def title(self, text):
+        pass
+
+    def lift(self):
+        pass
+
+    def focus_force(self):
+        pass
+
+    def after(self, ms, func):
+        self.next_id += 1
+        self.timers[self.next_id] = (clock.now + ms / 1000, func)
+        return self.next_id
+
+    def after_cancel(self, after_id):
+        self.timers.pop(after_id, None)
+
+    def destroy(self):
+        self.destroyed = True
+        self.fire("<Destroy>", Event(self))
+
+    # Advance the fake clock to the next after() callback and run it
+    def run_next(self):
+        after_id = min(self.timers, key=lambda i: self.timers[i][0])
+        due, func = self.timers.pop(after_id)
+        clock.now = max(clock.now, due)
+        func()
+
+
+class Canvas(Widget):
+    def __init__(self, master=None, **options):
+        super().__init__(master, **options)
+        self.items = {}
+        self.next_id = 0
+
+    def _create(self, *coords, **options):
+        self.next_id += 1
+        self.items[self.next_id] = list(coords)
+        return self.next_id
+
+    create_line = create_oval = create_text = _create
+
+    def coords(self, item, *coords):
+        self.items[item] = list(coords)
+
+    def itemconfig(self, item, **options):
+        pass
+
+    def delete(self, tag):
+        self.items.clear()
+
+
+class Entry(Widget):
+    def __init__(self, master=None, **options):
+        super().__init__(master, **options)
+        self.text = ""
+        self.cursor = 0
+
+    def delete(self, first, last=None):
+        self.text = ""
+
+    def insert(self, index, text):
+        self.text = text
+
+    def icursor(self, index):
+        self.cursor = index
+
+    def get(self):
+        return self.text
+
+
+clock = FakeClock()
+# every widget the run_* function under test created, in creation order
+widgets = []
+fake_tk = types.SimpleNamespace(Toplevel=Toplevel, Canvas=Canvas, Entry=Entry, Label=Widget, Button=Widget,
+                                Frame=Widget, END="end", TclError=Exception)
+fake_messagebox = types.SimpleNamespace(showinfo=lambda *a, **k: None, showwarning=lambda *a, **k: None)
+
+
+@pytest.fixture
+def live(monkeypatch, tmp_path):
+    uploads, recordings = [], []
+    widgets.clear()
+    fake_time = types.SimpleNamespace(perf_counter=clock.perf_counter)
+    monkeypatch.setattr(sim_clock, "time", fake_time)
+    monkeypatch.setattr(frame_scheduler, "time", fake_time)
+    monkeypatch.setattr(balance_test, "time", fake_time)
+    for module in (tracking_test, balance_test, typing_test):
+        monkeypatch.setattr(module, "tk", fake_tk)
+        monkeypatch.setattr(module, "messagebox", fake_messagebox)
+        monkeypatch.setattr(module, "show_learn_popup", lambda *args: None)
+        monkeypatch.setattr(module, "upload_worker", types.SimpleNamespace(
+            submit=lambda label, func, user_id, elapsed, accuracy, *args, **kwargs: uploads.append(accuracy)))
+    monkeypatch.setattr(Config, "RECORD_SESSIONS", True)
+    save = InputRecorder.save
+    monkeypatch.setattr(InputRecorder, "save", lambda self: recordings.append(save(self, str(tmp_path))))
+    return types.SimpleNamespace(uploads=uploads, recordings=recordings)
+
+
+def first(kind):
+    return next(widget for widget in widgets if type(widget) is kind)
+
+
+# The live score, the score stored in the recording and the replayed score all agree
+def assert_replays(live):
+    assert len(live.uploads) == 1 and len(live.recordings) == 1
+    recording = load_recording(live.recordings[0])
+    assert recording.events
+    assert recording.score == pytest.approx(live.uploads[0], abs=1e-9)
+    assert replay(recording) == pytest.approx(live.uploads[0], abs=1e-9)
+
+
+@pytest.mark.parametrize("level", ["normal", "severe"])
+def test_tracking_replay_matches_live(live, level):
+    tracking_test.run_target_tracking(None, 1, level, seed=1234)
+    window, canvas = first(Toplevel), first(Canvas)
+    frame = 0
+    while not window.destroyed:
+        window.run_next()
+        frame += 1
+        # a hand that loosely follows the drawn target, reporting motion on every other frame
+        target = next(iter(canvas.items.values()))
+        if frame % 2 == 0 and len(target) == 4:
+            x = (target[0] + target[2]) / 2 + 25 * math.sin(frame / 7)
+            y = (target[1] + target[3]) / 2 + 25 * math.cos(frame / 5)
+            canvas.fire("<Motion>", Event(canvas, int(x), int(y)))
+    assert_replays(live)
+
+
+@pytest.mark.parametrize("level", ["normal", "severe"])
+def test_balance_replay_matches_live(live, level):
+    balance_test.run_balance_game(None, 1, level, seed=1234)
+    window, canvas = first(Toplevel), first(Canvas)
+    frame = 0
+    while not window.destroyed:
+        window.run_next()
+        frame += 1
+        # push back against the lean every few frames, with the odd stray key in between
+        if frame % 5 == 0:
+            x1, _, x2, _ = canvas.items[2]
+            keysym = "Left" if x2 > x1 else "Right"
+            window.fire("<KeyPress>", Event(window, keysym=keysym))
+        elif frame % 37 == 0:
+            window.fire("<KeyPress>", Event(window, keysym="space", char=" "))
+    assert_replays(live)
+
+
+@pytest.mark.parametrize("level", ["normal", "severe"])
+def test_typing_replay_matches_live(live, level):
+    typing_test.run_typing_test(None, 1, level, seed=1234)
+    window, entry = first(Toplevel), first(Entry)
+    # a twin session fed the same keys tells the test what the entry should show
+    twin = TypingSession(level, seed=1234)
+    keys = []
+    for i, char in enumerate(twin.target_text):
+        keys.append((char, char))
+        if i % 11 == 3:
+            keys += [("x", "x"), ("BackSpace", "\b")]
+        if i % 17 == 5:
+            keys += [("Left", ""), ("Right", "")]
+    keys += [("Home", ""), ("Delete", "\x7f"), ("End", "")]
+    for keysym, char in keys:
+        assert entry.fire("<KeyPress>", Event(entry, keysym=keysym, char=char))
+        twin.key(keysym, char)
+        # the entry only ever shows what the session holds
+        assert (entry.get(), entry.cursor) == (twin.text, twin.cursor)
+    # Return reaches the window binding because the entry lets it through
+    assert not entry.fire("<KeyPress>", Event(entry, keysym="Return", char="\r"))
+    window.fire("<Return>", Event(window, keysym="Return", char="\r"))
+    assert window.destroyed
+    assert_replays(live)
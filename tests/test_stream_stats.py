@@ -0,0 +1,24 @@
+import numpy as np
+
+from frontend.stream_stats import RingBuffer, StreamingStats
+
+
+def test_streaming_stats_match_numpy():
+    samples = np.random.default_rng(1).gamma(2.0, 10.0, 20000)
+    stats = StreamingStats()
+    for x in samples:
+        stats.add(float(x))
+    summary = stats.summary()
+    assert summary["count"] == samples.size
+    assert np.isclose(summary["mean"], samples.mean())
+    assert np.isclose(summary["std"], samples.std(ddof=1))
+    for p in (50, 90, 95):
+        assert abs(summary[f"p{p}"] - np.percentile(samples, p)) / np.percentile(samples, p) < 0.02
+
+
+def test_ring_buffer_keeps_most_recent():
+    buffer = RingBuffer(3)
+    for x in range(5):
+        buffer.append(x)
+    assert list(buffer.values()) == [2, 3, 4]
+    assert buffer.summary()["max"] == 4
@@ -0,0 +1,58 @@
+import pytest
+
+from app import models
+
+
+def result(user_id, **fields):
+    return {"user_id": user_id, "avg_time": 1.5, "accuracy": 80.0, "mode": "normal", **fields}
+
+
+def test_upload_test_saves_result(client, user_id):
+    r = client.post("/upload_test", json=result(user_id))
+    assert r.status_code == 200
+    assert r.get_json() == {"status": "saved"}
+
+
+def test_non_finite_values_are_invalid(client, user_id):
+    for value in ("nan", "inf", "-Infinity"):
+        r = client.post("/upload_test", json=result(user_id, accuracy=value))
+        assert r.status_code == 400
+
+    r = client.post("/upload_tests_batch", json=[result(user_id, avg_time="nan"), result(user_id)])
+    assert r.status_code == 200
+    statuses = r.get_json()["results"]
+    assert statuses[0]["status"] == "invalid"
+    assert statuses[1]["status"] == "saved"
+
+
+def test_unknown_user_is_rejected_by_both_endpoints(app, client, user_id):
+    r = client.post("/upload_test", json=result(user_id + 100))
+    assert r.status_code == 400
+    assert r.get_json()["error"] == "unknown user_id"
+
+    r = client.post("/upload_tests_batch", json=[result(user_id + 100)])
+    assert r.get_json()["results"][0]["status"] == "invalid"
+    with app.app_context():
+        assert models.TestResult.query.count() == 0
+
+
+def test_quiz_upload_saves_answers(app, client, user_id):
+    r = client.post("/upload_quiz", json={"user_id": user_id, "score": 1, "total_questions": 2,
+                                          "answers": [["Q1", "a", "a", 1], ["Q2", "b", "c", 0]]})
+    assert r.status_code == 200
+    with app.app_context():
+        assert models.QuizAnswer.query.count() == 2
+
+
+@pytest.mark.parametrize("body", [
+    [{"user_id": 1, "score": 1, "total_questions": 2}],
+    {"user_id": "one", "score": 1, "total_questions": 2},
+    {"user_id": {"id": 1}, "score": 1, "total_questions": 2},
+    {"user_id": 1.5, "score": 1, "total_questions": 2},
+    {"user_id": 1, "score": [1], "total_questions": 2},
+])
+def test_malformed_quiz_is_a_client_error(app, client, user_id, body):
+    r = client.post("/upload_quiz", json=body)
+    assert r.status_code == 400
+    with app.app_context():
+        assert models.QuizResult.query.count() == 0
@@ -0,0 +1,21 @@
+import msgpack
+import pytest
+
+
+@pytest.mark.parametrize("accept", [None, "*/*", "application/json", "application/*",
+                                    "application/json, application/msgpack",
+                                    "application/msgpack;q=0.5, application/json"])
+def test_json_unless_msgpack_is_explicitly_preferred(client, accept):
+    headers = {"Accept": accept} if accept else {}
+    r = client.post("/register", json={"username": "a"}, headers=headers)
+    assert r.mimetype == "application/json"
+    assert r.get_json() == {"user_id": 1}
+
+
+@pytest.mark.parametrize("accept", ["application/msgpack", "application/x-msgpack, */*;q=0.1",
+                                    "application/msgpack, application/json;q=0.9"])
+def test_msgpack_when_explicitly_preferred(client, accept):
+    r = client.post("/register", data=msgpack.packb({"username": "a"}),
+                    headers={"Content-Type": "application/msgpack", "Accept": accept})
+    assert r.mimetype == "application/msgpack"
+    assert msgpack.unpackb(r.data) == {"user_id": 1}
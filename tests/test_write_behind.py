@@ -0,0 +1,77 @@
+from datetime import datetime
+
+import pytest
+
+from app import models
+from app.ingest import DUPLICATE, QUEUED
+
+
+def result(user_id, key):
+    return {"user_id": user_id, "avg_time": 1.0, "accuracy": 75.0, "mode": "normal", "idempotency_key": key}
+
+
+def test_replayed_key_in_queue_is_deduplicated(make_app):
+    # a long flush interval keeps the first upload queued while the replay arrives
+    app = make_app(WRITE_BEHIND=True, WRITE_BEHIND_FLUSH_INTERVAL=0.5)
+    client = app.test_client()
+    user_id = client.post("/register", json={"username": "tester"}).get_json()["user_id"]
+
+    first = client.post("/upload_test", json=result(user_id, "k1"))
+    replay = client.post("/upload_test", json=result(user_id, "k1"))
+    batch = client.post("/upload_tests_batch", json=[result(user_id, "k1"), result(user_id, "k2")])
+    assert first.status_code == 202 and first.get_json()["status"] == QUEUED
+    assert replay.status_code == 200 and replay.get_json()["status"] == DUPLICATE
+    assert [s["status"] for s in batch.get_json()["results"]] == [DUPLICATE, QUEUED]
+
+    queue = app.extensions["write_behind"]
+    queue.close()
+    stats = queue.stats()
+    assert (stats["written"], stats["duplicates"], stats["failed"]) == (2, 2, 0)
+    with app.app_context():
+        assert sorted(k for (k,) in models.db.session.query(models.TestResult.idempotency_key)) == ["k1", "k2"]
+
+
+# A validated row, as the routes queue it
+def row(user_id, key):
+    return dict(result(user_id, key), timestamp=datetime(2025, 1, 1))
+
+
+def test_group_commit_skips_repeated_and_stored_keys(make_app):
+    app = make_app(WRITE_BEHIND=True)
+    client = app.test_client()
+    user_id = client.post("/register", json={"username": "tester"}).get_json()["user_id"]
+    queue = app.extensions["write_behind"]
+    queue.close()
+
+    with app.app_context():
+        queue._write([("test", row(user_id, "a")), ("test", row(user_id, "a")), ("test", row(user_id, "b"))])
+        queue._write([("test", row(user_id, "b"))])
+        assert models.TestResult.query.count() == 2
+    assert (queue.written, queue.duplicates, queue.failed, queue.commits) == (2, 2, 0, 2)
+
+
+def quiz(user_id):
+    return {"user_id": user_id, "score": 1, "total_questions": 2,
+            "answers": [["Q1", "a", "a", 1], ["Q2", "b", "c", 0]]}
+
+
+@pytest.mark.parametrize("fields", [
+    {"user_id": [1]},
+    {"user_id": 999},
+    {"score": "many"},
+    {"score": 3},
+    {"total_questions": -1},
+    {"answers": [["Q1", "a", "a"]]},
+    {"answers": [["Q1", ["a"], "a", 1]]},
+])
+def test_invalid_quiz_is_rejected_before_it_is_queued(make_app, fields):
+    app = make_app(WRITE_BEHIND=True)
+    client = app.test_client()
+    user_id = client.post("/register", json={"username": "tester"}).get_json()["user_id"]
+
+    assert client.post("/upload_quiz", json=dict(quiz(user_id), **fields)).status_code == 400
+    assert client.post("/upload_quiz", json=quiz(user_id)).status_code == 202
+    queue = app.extensions["write_behind"]
+    queue.close()
+    stats = queue.stats()
+    assert (stats["enqueued"], stats["written"], stats["failed"]) == (1, 1, 0)